@@ -0,0 +1,143 @@
+import re
+import time
+from collections import OrderedDict
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+def normalize_query(query):
+    """Case-, punctuation- and whitespace-insensitive form of a question."""
+    return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# --- Semantic Answer Cache ---
+class AnswerCache:
+    """
+    Per-video cache of /process answers, keyed by (video_id, addition_mode).
+
+    lookup() first matches the normalised query text, which needs no embedding, then
+    the query vector against cached questions by cosine similarity above
+    similarity_threshold. Entries expire after ttl_seconds; each (video_id, mode) keeps
+    at most max_entries questions in LRU order, and at most max_buckets (video_id, mode)
+    pairs are kept, least recently used dropped first. add() sweeps expired entries.
+
+    invalidate() bumps the video's generation; an add() carrying the generation read
+    before the answer was produced is dropped if the video was invalidated meanwhile.
+    """
+    def __init__(self, similarity_threshold=0.92, ttl_seconds=6 * 3600, max_entries=64, max_buckets=256):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_buckets = max_buckets
+        self._entries = OrderedDict()  # (video_id, mode) -> OrderedDict of normalised query -> entry, LRU first
+        self._generations = {}  # video_id -> number of invalidations
+        self.lookups = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.saved_ms = 0.0
+
+    def _bucket(self, video_id, mode, create=False):
+        key = (video_id, bool(mode))
+        bucket = self._entries.get(key)
+        if bucket is None:
+            if not create:
+                return None
+            bucket = self._entries[key] = OrderedDict()
+        self._entries.move_to_end(key)
+        self._expire(bucket, time.time() - self.ttl_seconds)
+        if not bucket and not create:
+            del self._entries[key]
+            return None
+        return bucket
+
+    @staticmethod
+    def _expire(bucket, cutoff):
+        for text in [text for text, entry in bucket.items() if entry["created_at"] < cutoff]:
+            del bucket[text]
+
+    def _sweep(self):
+        """Expire old entries in every bucket, drop empty buckets, then the least recently used over max_buckets."""
+        cutoff = time.time() - self.ttl_seconds
+        for key in list(self._entries):
+            self._expire(self._entries[key], cutoff)
+            if not self._entries[key]:
+                del self._entries[key]
+        while len(self._entries) > self.max_buckets:
+            self._entries.popitem(last=False)
+
+    def _hit(self, bucket, text, match):
+        entry = bucket[text]
+        bucket.move_to_end(text)
+        self.saved_ms += entry["latency_ms"]
+        return entry["response"], match
+
+    def lookup_text(self, video_id, mode, query):
+        """(response, "exact") for a cached question with the same normalised text, or None."""
+        self.lookups += 1
+        bucket = self._bucket(video_id, mode)
+        text = normalize_query(query)
+        if not bucket or text not in bucket:
+            return None
+        self.exact_hits += 1
+        return self._hit(bucket, text, "exact")
+
+    def lookup_vector(self, video_id, mode, query_vector):
+        """
+        (response, "semantic") for the most similar cached question above the threshold, or None.
+        Follows a missed lookup_text() for the same query, so it does not count a lookup.
+        """
+        bucket = self._bucket(video_id, mode)
+        if not bucket:
+            return None
+        texts = list(bucket)
+        similarities = np.stack([bucket[text]["vector"] for text in texts]) @ _unit(query_vector)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        self.semantic_hits += 1
+        return self._hit(bucket, texts[best], "semantic")
+
+    def generation(self, video_id):
+        """Read before producing an answer and pass it to add(), so answers from a replaced index are dropped."""
+        return self._generations.get(video_id, 0)
+
+    def add(self, video_id, mode, query, query_vector, response, latency_ms, generation=None):
+        """Cache the response to query, remembering how long it took to produce."""
+        if generation is not None and generation != self.generation(video_id):
+            return
+        bucket = self._bucket(video_id, mode, create=True)
+        text = normalize_query(query)
+        bucket[text] = {
+            "vector": _unit(query_vector),
+            "response": response,
+            "latency_ms": latency_ms,
+            "created_at": time.time()
+        }
+        bucket.move_to_end(text)
+        while len(bucket) > self.max_entries:
+            bucket.popitem(last=False)
+        self._sweep()
+
+    def invalidate(self, video_id):
+        """Drop every cached answer for video_id, e.g. after its transcript changes."""
+        self._generations[video_id] = self.generation(video_id) + 1
+        for key in [key for key in self._entries if key[0] == video_id]:
+            del self._entries[key]
+
+    def stats(self):
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "videos": len({video_id for video_id, _ in self._entries}),
+            "entries": sum(len(bucket) for bucket in self._entries.values()),
+            "max_buckets": self.max_buckets,
+            "similarity_threshold": self.similarity_threshold,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "hit_ratio": round(hits / self.lookups, 3) if self.lookups else None,
+            "saved_ms": round(self.saved_ms, 1)
+        }
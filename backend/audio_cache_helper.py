@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+AUDIO_ROOT = os.path.join("data", "audio")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+def text_hash(text):
+    """Short content hash of a segment's source text, so edited transcripts never reuse stale audio."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def _entry_key(lang, segment_no, voice, digest):
+    return f"{lang}|{segment_no}|{voice}|{digest}"
+
+# --- Audio Segment Cache ---
+class AudioSegmentCache:
+    """
+    Disk cache of generated audio segments keyed by (video_id, language, segment, voice, text hash).
+
+    Each video keeps a manifest.json under data/audio/<video_id> listing its files, so
+    lookups are dictionary hits instead of a filesystem stat per segment. All manifests
+    are loaded once at startup into one LRU order across videos; when the total size
+    exceeds max_bytes the least recently used files are deleted until it is back under
+    low_water * max_bytes, so a full cache does not evict on every add. Access times are
+    persisted on flush().
+    """
+    def __init__(self, root=AUDIO_ROOT, max_bytes=2 * 1024 * 1024 * 1024, low_water=0.9):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.low_water_bytes = int(max_bytes * low_water)
+        self._manifests = {}  # video_id -> {entry key -> entry}
+        self._lru = OrderedDict()  # (video_id, entry key), least recently used first
+        self._dirty = set()
+        self._lock = threading.Lock()  # flush() runs in a worker thread while the loop keeps updating entries
+        self._flush_lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._load_all()
+
+    def _manifest_path(self, video_id):
+        return os.path.join(self.root, video_id, MANIFEST_NAME)
+
+    def _load_all(self):
+        for video_id in os.listdir(self.root):
+            path = self._manifest_path(video_id)
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Ignoring unreadable audio manifest for {video_id}: {str(e)}")
+                continue
+            if stored.get("version") != MANIFEST_VERSION:
+                continue
+            entries = stored.get("entries", {})
+            self._manifests[video_id] = entries
+            self.total_bytes += sum(entry["bytes"] for entry in entries.values())
+        for _, video_id, key in sorted(
+            (entry["last_access"], video_id, key)
+            for video_id, entries in self._manifests.items()
+            for key, entry in entries.items()
+        ):
+            self._lru[(video_id, key)] = None
+        print(f"🎧 Audio cache: {sum(len(m) for m in self._manifests.values())} segments, {self.total_bytes} bytes")
+
+    def path_for(self, video_id, lang, segment_no, voice, digest):
+        """Where the file for this key lives (or will be written)."""
+        voice_name = voice.replace(os.sep, "_")
+        return os.path.join(self.root, video_id, lang, f"segment_{segment_no:04d}_{voice_name}_{digest}.mp3")
+
+    def peek(self, video_id, lang, segment_no, voice, digest):
+        """Path of the cached file for the key, or None, without touching LRU order or counters."""
+        entry = self._manifests.get(video_id, {}).get(_entry_key(lang, segment_no, voice, digest))
+        return entry["path"] if entry is not None else None
+
+    def get(self, video_id, lang, segment_no, voice, digest):
+        """Path of the cached file for the key, or None. Marks the entry most recently used."""
+        with self._lock:
+            entry = self._manifests.get(video_id, {}).get(_entry_key(lang, segment_no, voice, digest))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["last_access"] = time.time()
+            self._lru.move_to_end((video_id, _entry_key(lang, segment_no, voice, digest)))
+            self._dirty.add(video_id)
+            return entry["path"]
+
+    def add(self, video_id, lang, segment_no, voice, digest, path):
+        """Record a freshly written file, then evict least recently used files if over quota."""
+        size = os.path.getsize(path)
+        key = _entry_key(lang, segment_no, voice, digest)
+        with self._lock:
+            entries = self._manifests.setdefault(video_id, {})
+            previous = entries.get(key)
+            if previous is not None:
+                self.total_bytes -= previous["bytes"]
+            entries[key] = {"path": path, "bytes": size, "last_access": time.time()}
+            self.total_bytes += size
+            self._lru[(video_id, key)] = None
+            self._lru.move_to_end((video_id, key))
+            self._dirty.add(video_id)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def discard(self, video_id, lang, segment_no, voice, digest):
+        """Forget an entry whose file turned out to be missing or broken."""
+        key = _entry_key(lang, segment_no, voice, digest)
+        with self._lock:
+            entry = self._manifests.get(video_id, {}).pop(key, None)
+            self._lru.pop((video_id, key), None)
+            if entry is not None:
+                self.total_bytes -= entry["bytes"]
+                self._dirty.add(video_id)
+
+    def _evict(self):
+        """Delete least recently used files until the total is under the low-water mark; the newest entry is kept."""
+        while self.total_bytes > self.low_water_bytes and len(self._lru) > 1:
+            video_id, key = self._lru.popitem(last=False)[0]
+            entry = self._manifests[video_id].pop(key)
+            self.total_bytes -= entry["bytes"]
+            self._dirty.add(video_id)
+            self.evictions += 1
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass
+        print(f"🧹 Audio cache evicted down to {self.total_bytes} bytes")
+
+    def flush(self):
+        """Write the manifests changed since the last flush. Blocking; call via asyncio.to_thread."""
+        with self._flush_lock:
+            self._write_dirty()
+
+    def _write_dirty(self):
+        with self._lock:
+            snapshots = {
+                video_id: {key: dict(entry) for key, entry in self._manifests.get(video_id, {}).items()}
+                for video_id in self._dirty
+            }
+            self._dirty.clear()
+
+        for video_id, entries in snapshots.items():
+            path = self._manifest_path(video_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": entries}, f)
+            os.replace(path + ".tmp", path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "videos": len(self._manifests),
+            "segments": sum(len(entries) for entries in self._manifests.values()),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "low_water_bytes": self.low_water_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
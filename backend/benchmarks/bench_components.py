@@ -0,0 +1,60 @@
+"""
+Microbenchmark construction and teardown of the /process components, per request vs. registry.
+
+Uses main.py's own builders from qa_helper (QA chain, answer refinement crew, yt-dlp client) and
+calls no model or network, so only the object overhead is measured:
+
+    python backend/benchmarks/bench_components.py --requests 50
+
+Needs the backend requirements installed; dummy API keys are set if none are configured.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("SERPER_API_KEY", "bench")
+
+from component_helper import ComponentRegistry
+from qa_helper import get_conversational_chain, build_refinement_crew, build_yt_dlp
+
+FACTORIES = {"qa_chain": get_conversational_chain, "refinement_crew": build_refinement_crew, "yt_dlp": build_yt_dlp}
+
+def per_request(name, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        instance = FACTORIES[name]()
+        close = getattr(instance, "close", None)
+        if callable(close):
+            close()
+    return (time.perf_counter() - start) * 1000 / requests
+
+def with_registry(name, requests):
+    registry = ComponentRegistry()
+    registry.register(name, FACTORIES[name], pool_size=None if name == "qa_chain" else 2)
+    start = time.perf_counter()
+    for _ in range(requests):
+        if name == "qa_chain":
+            registry.get(name)
+        else:
+            with registry.lease(name):
+                pass
+    elapsed = (time.perf_counter() - start) * 1000 / requests
+    registry.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'component':>16}{'per-request ms':>16}{'registry ms':>13}{'speedup':>9}")
+    for name in FACTORIES:
+        before = per_request(name, args.requests)
+        after = with_registry(name, args.requests)
+        print(f"{name:>16}{before:>16.2f}{after:>13.3f}{before / after:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
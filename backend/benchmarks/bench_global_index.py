@@ -0,0 +1,102 @@
+"""
+Benchmark the per-video FAISS layout against the shared GlobalVectorIndex.
+
+Uses random vectors so it needs only numpy and faiss:
+
+    python backend/benchmarks/bench_global_index.py --videos 10000 --chunks 20 --dim 768
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from global_index_helper import GlobalVectorIndex
+
+def rss_bytes():
+    """Current resident set size of this process (Linux), or 0 if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"Generating {args.videos} videos x {args.chunks} chunks, dim={args.dim}...")
+    data = rng.standard_normal((args.videos, args.chunks, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    query_videos = rng.integers(0, args.videos, args.queries)
+    video_ids = [f"video{v:06d}" for v in range(args.videos)]
+    chunk_meta = [{"Text": "", "start": c * 30.0, "end": c * 30.0 + 30} for c in range(args.chunks)]
+
+    # --- Per-video layout ---
+    base = rss_bytes()
+    start = time.perf_counter()
+    per_video = {}
+    for v, video_id in enumerate(video_ids):
+        index = faiss.IndexFlatL2(args.dim)
+        index.add(data[v])
+        per_video[video_id] = index
+    per_video_build = time.perf_counter() - start
+    per_video_rss = rss_bytes() - base
+
+    per_video_filtered = timed(
+        lambda i: per_video[video_ids[query_videos[i]]].search(queries[i:i + 1], args.k), args.queries)
+    cross_queries = min(args.queries, 10)
+
+    def per_video_cross(i):
+        results = [(index.search(queries[i:i + 1], args.k), video_id) for video_id, index in per_video.items()]
+        return sorted(results, key=lambda r: r[0][0][0][0])[:args.k]
+    per_video_cross_ms = timed(per_video_cross, cross_queries)
+    del per_video
+
+    # --- Shared global index ---
+    base = rss_bytes()
+    start = time.perf_counter()
+    global_index = GlobalVectorIndex(path=tempfile.mkdtemp())
+    for v, video_id in enumerate(video_ids):
+        global_index.add_video(video_id, data[v], chunk_meta)
+    global_build = time.perf_counter() - start
+    global_rss = rss_bytes() - base
+
+    global_filtered = timed(
+        lambda i: global_index.search(queries[i], args.k, [video_ids[query_videos[i]]]), args.queries)
+    global_cross = timed(lambda i: global_index.search(queries[i], args.k), args.queries)
+
+    # Recall of approximate cross-video search against an exact scan
+    flat = faiss.IndexFlatL2(args.dim)
+    flat.add(data.reshape(-1, args.dim))
+    _, exact_ids = flat.search(queries, args.k)
+    found = 0
+    for i in range(args.queries):
+        hits = global_index.search(queries[i], args.k)
+        hit_ids = {int(h["video_id"][5:]) * args.chunks + h["chunk"] for h in hits}
+        found += len(hit_ids & set(exact_ids[i].tolist()))
+    recall = found / (args.queries * args.k)
+
+    print()
+    print(f"{'layout':<12}{'build s':>10}{'RSS MB':>10}{'filtered ms':>14}{'cross ms':>12}")
+    print(f"{'per-video':<12}{per_video_build:>10.2f}{per_video_rss / 1e6:>10.1f}{per_video_filtered:>14.3f}{per_video_cross_ms:>12.1f}")
+    print(f"{'global':<12}{global_build:>10.2f}{global_rss / 1e6:>10.1f}{global_filtered:>14.3f}{global_cross:>12.3f}")
+    print(f"\nGlobal cross-video recall@{args.k}: {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
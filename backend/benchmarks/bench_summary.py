@@ -0,0 +1,83 @@
+"""
+Benchmark the hierarchical summarizer against a simulated Mistral client.
+
+Reports LLM calls, wall time and the largest prompt per call for a cold summary, a warm
+re-run, and a re-run after appending text to the transcript (only the new chunk's path
+to the root should be recomputed):
+
+    python backend/benchmarks/bench_summary.py --hours 3 --latency 0.2 --fan-in 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from summary_helper import SummarizationEngine, estimate_tokens
+
+WORDS = "the model learns a function that maps inputs to outputs using gradient descent on data".split()
+WORDS_PER_HOUR = 9000
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+
+class _Response:
+    def __init__(self, content):
+        self.choices = [_Choice(content)]
+
+class FakeChat:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.max_prompt_tokens = 0
+
+    async def complete_async(self, model, messages, max_tokens, temperature):
+        self.calls += 1
+        self.max_prompt_tokens = max(self.max_prompt_tokens, estimate_tokens(messages[-1]["content"]))
+        await asyncio.sleep(self.latency)
+        return _Response(" ".join(messages[-1]["content"].split()[-60:]) + ".")
+
+class FakeClient:
+    def __init__(self, latency):
+        self.chat = FakeChat(latency)
+
+def make_transcript(words):
+    sentences = []
+    for i in range(0, words, 12):
+        sentences.append(" ".join(WORDS[(i + j) % len(WORDS)] for j in range(12)).capitalize() + ".")
+    return " ".join(sentences)
+
+def run(engine, client, transcript):
+    calls = client.chat.calls
+    start = time.perf_counter()
+    asyncio.run(engine.summary(transcript))
+    return client.chat.calls - calls, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--chunk-tokens", type=int, default=2000)
+    parser.add_argument("--fan-in", type=int, default=4)
+    args = parser.parse_args()
+
+    client = FakeClient(args.latency)
+    engine = SummarizationEngine(client, "bench", chunk_tokens=args.chunk_tokens, fan_in=args.fan_in)
+    transcript = make_transcript(int(args.hours * WORDS_PER_HOUR))
+    print(f"transcript: {estimate_tokens(transcript)} tokens, chunk_tokens={args.chunk_tokens}, fan_in={args.fan_in}")
+
+    print(f"{'run':>10}{'calls':>8}{'seconds':>10}")
+    for name, text in [("cold", transcript), ("warm", transcript),
+                       ("appended", transcript + " " + make_transcript(600))]:
+        calls, seconds = run(engine, client, text)
+        print(f"{name:>10}{calls:>8}{seconds:>10.2f}")
+    print(f"largest prompt: {client.chat.max_prompt_tokens} tokens, node cache: {engine.node_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark chunking and translation-context lookups on synthetic long transcripts.
+
+Compares the previous list.index / prefix-sum implementations with the
+SegmentTable/WordIndex-based ones, so the quadratic-vs-linear scaling is visible,
+and reports the memory held by the list-of-dicts vs columnar segment storage:
+
+    python backend/benchmarks/bench_transcript.py --hours 1 2.5 5 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cache_helper import _deep_sizeof
+from transcript_helper import chunk_transcript, context_text, SegmentTable, WordIndex
+
+WORDS = "the model learns a function that maps inputs to outputs using gradient descent on data".split()
+
+def synthetic_raw(hours, segment_seconds=3.0, words_per_segment=8):
+    """Entries in the shape returned by YouTubeTranscriptApi's to_raw_data()."""
+    rng = random.Random(0)
+    return [
+        {
+            "text": " ".join(rng.choice(WORDS) for _ in range(words_per_segment)),
+            "start": i * segment_seconds,
+            "duration": segment_seconds
+        }
+        for i in range(int(hours * 3600 / segment_seconds))
+    ]
+
+# --- Previous implementations, kept for comparison ---
+def chunk_transcript_before(transcript_data, max_words=50):
+    transcript_list = transcript_data["transcript"]
+    chunks, current_chunk, current_word_count, chunk_start_time = [], [], 0, None
+    for segment in transcript_list:
+        words = segment["Text"].split()
+        if chunk_start_time is None:
+            chunk_start_time = segment["Start"]
+        if current_word_count + len(words) > max_words:
+            chunk_end_time = transcript_list[transcript_list.index(segment) - 1]["End"]
+            chunks.append({"Text": " ".join(current_chunk), "Start": chunk_start_time, "End": chunk_end_time})
+            current_chunk, current_word_count, chunk_start_time = [], 0, segment["Start"]
+        current_chunk.extend(words)
+        current_word_count += len(words)
+    if current_chunk:
+        chunks.append({"Text": " ".join(current_chunk), "Start": chunk_start_time, "End": transcript_list[-1]["End"]})
+    return chunks
+
+def context_window_before(transcript_original, whole_transcript, segment_no):
+    """Context lookups for one process_transcript window, as done before."""
+    segment_index = next(i for i, seg in enumerate(transcript_original) if seg['Segment'] == segment_no)
+    whole_words = whole_transcript.split()
+    total_words = len(whole_words)
+    contexts = []
+    for i in range(max(0, segment_index - 5), min(len(transcript_original), segment_index + 11)):
+        segment_word_count = len(transcript_original[i]['Text'].split())
+        segment_start_word_idx = sum(len(s['Text'].split()) for s in transcript_original[:i])
+        left_idx = max(0, segment_start_word_idx - 10)
+        right_idx = min(total_words, segment_start_word_idx + segment_word_count + 15)
+        contexts.append(" ".join(whole_words[left_idx:right_idx]))
+    return contexts
+
+def context_window_after(segments, words, segment_no):
+    segment_index = segments.position(segment_no)
+    return [
+        context_text(segments, words, i)
+        for i in range(max(0, segment_index - 5), min(len(segments), segment_index + 11))
+    ]
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 2.5, 5, 10])
+    args = parser.parse_args()
+
+    print(f"{'hours':>6}{'segments':>10}{'chunk before ms':>17}{'chunk after ms':>16}"
+          f"{'window before ms':>18}{'window after ms':>17}{'dicts MB':>10}{'table MB':>10}")
+    for hours in args.hours:
+        table = SegmentTable.from_raw(synthetic_raw(hours))
+        segments = table.to_dicts()
+        whole = " ".join(segment["Text"] for segment in segments)
+        words = WordIndex(whole)
+        transcript_data = {"transcript": segments}
+        middle = len(segments) // 2
+
+        assert [c["Text"] for c in chunk_transcript_before(transcript_data)] == \
+               [c["Text"] for c in chunk_transcript(transcript_data)]
+        assert context_window_before(segments, whole, middle) == context_window_after(table, words, middle)
+
+        print(f"{hours:>6}{len(segments):>10}"
+              f"{timed(lambda: chunk_transcript_before(transcript_data)):>17.1f}"
+              f"{timed(lambda: chunk_transcript(transcript_data)):>16.1f}"
+              f"{timed(lambda: context_window_before(segments, whole, middle)):>18.1f}"
+              f"{timed(lambda: context_window_after(table, words, middle)):>17.3f}"
+              f"{_deep_sizeof(segments, set()) / 1e6:>10.1f}"
+              f"{_deep_sizeof(table, set()) / 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
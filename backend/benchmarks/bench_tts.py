@@ -0,0 +1,61 @@
+"""
+Benchmark segment synthesis and dub track rendering without the network.
+
+Uses the offline silence TTS backend with a simulated round trip, so the effect of
+the per-backend concurrency limit is visible:
+
+    python backend/benchmarks/bench_tts.py --segments 400 --latency 0.3 --concurrency 1 4 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import dub_helper
+from dub_helper import mp3_frames, render_track
+from tts_helper import create_tts_backend
+
+WORDS = "the model learns a function that maps inputs to outputs using gradient descent on data".split()
+
+async def synthesize_all(backend, texts, out_dir):
+    paths = [os.path.join(out_dir, f"segment_{i + 1:04d}.mp3") for i in range(len(texts))]
+    await asyncio.gather(*(backend.save(text, backend.voice_for("en"), path) for text, path in zip(texts, paths)))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segments", type=int, default=400)
+    parser.add_argument("--segment-seconds", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    texts = [" ".join(WORDS[(i + j) % len(WORDS)] for j in range(6)) for i in range(args.segments)]
+    starts = [i * args.segment_seconds for i in range(args.segments)]
+    ends = [start + args.segment_seconds for start in starts]
+
+    print(f"{'concurrency':>12}{'synth s':>10}{'segments/s':>12}{'render ms':>11}{'track s':>9}{'frames ok':>11}")
+    for concurrency in args.concurrency:
+        out_dir = tempfile.mkdtemp()
+        dub_helper.DUB_ROOT = out_dir
+        backend = create_tts_backend("silence", {}, "silence-en", max_concurrency=concurrency, latency=args.latency)
+
+        start = time.perf_counter()
+        paths = asyncio.run(synthesize_all(backend, texts, out_dir))
+        synth = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = render_track("bench", "en", paths, starts, ends)
+        render = (time.perf_counter() - start) * 1000
+
+        with open(dub_helper.dub_paths("bench", "en")[1], "rb") as f:
+            track = f.read()
+        frames_ok = sum(length for _, length, _ in mp3_frames(track)) == len(track)
+        print(f"{concurrency:>12}{synth:>10.2f}{args.segments / synth:>12.1f}{render:>11.1f}"
+              f"{index['duration']:>9.1f}{str(frames_ok):>11}")
+
+if __name__ == "__main__":
+    main()
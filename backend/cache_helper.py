@@ -0,0 +1,195 @@
+import sys
+import time
+from collections import OrderedDict
+
+# --- Per-Video State ---
+class VideoState:
+    """Everything kept in memory for one video: transcript store, FAISS vector store and metadata."""
+    def __init__(self, video_id, ttl_seconds):
+        self.video_id = video_id
+        self.transcript_store = None
+        self.vector_store = None
+        self.metadata = None
+        self.size_bytes = 0
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.expires_at = self.created_at + ttl_seconds if ttl_seconds else None
+
+    def is_expired(self, now=None):
+        return self.expires_at is not None and (now or time.time()) >= self.expires_at
+
+# --- Size Estimation ---
+def _deep_sizeof(obj, seen):
+    """Approximate the memory held by plain Python data (strings, containers, simple objects)."""
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(_deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return size + _deep_sizeof(vars(obj), seen)
+    slots = getattr(type(obj), "__slots__", ())
+    if slots:
+        return size + sum(_deep_sizeof(getattr(obj, name, None), seen) for name in slots)
+    return size
+
+def _vector_store_size(vector_store, seen):
+    """Approximate the memory held by a LangChain FAISS store (raw vectors plus docstore texts)."""
+    if vector_store is None:
+        return 0
+    size = 0
+    index = getattr(vector_store, "index", None)
+    if index is not None:
+        size += index.ntotal * index.d * 4  # float32 vectors
+    docstore = getattr(getattr(vector_store, "docstore", None), "_dict", None)
+    if docstore:
+        size += sum(_deep_sizeof(doc.page_content, seen) for doc in docstore.values())
+    size += _deep_sizeof(getattr(vector_store, "index_to_docstore_id", None), seen)
+    return size
+
+def estimate_size(state):
+    """Estimate the bytes held by a VideoState, counting shared objects once."""
+    seen = set()
+    return (_deep_sizeof(state.transcript_store, seen)
+            + _deep_sizeof(state.metadata, seen)
+            + _vector_store_size(state.vector_store, seen))
+
+# --- LRU/TTL Cache ---
+class VideoStateCache:
+    """
+    Bounded in-memory cache of VideoState entries.
+
+    Entries are evicted least-recently-used first once either max_entries or
+    max_bytes is exceeded, and are dropped on access once their TTL expires.
+    """
+    def __init__(self, max_entries=64, max_bytes=512 * 1024 * 1024, ttl_seconds=6 * 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __contains__(self, video_id):
+        return self.peek(video_id) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def peek(self, video_id):
+        """Return the live entry for video_id without touching LRU order or counters."""
+        state = self._entries.get(video_id)
+        if state is not None and state.is_expired():
+            self._remove(video_id)
+            self.expirations += 1
+            return None
+        return state
+
+    def get(self, video_id):
+        """Return the live entry for video_id (or None), marking it most recently used."""
+        state = self.peek(video_id)
+        if state is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        state.last_access = time.time()
+        self._entries.move_to_end(video_id)
+        return state
+
+    def set(self, video_id, ttl_seconds=None, **fields):
+        """Create or update the entry for video_id with the given fields and enforce the bounds."""
+        state = self.peek(video_id)
+        if state is None:
+            state = VideoState(video_id, ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+            self._entries[video_id] = state
+        elif ttl_seconds is not None:
+            state.expires_at = time.time() + ttl_seconds if ttl_seconds else None
+
+        for name, value in fields.items():
+            if not hasattr(state, name):
+                raise AttributeError(f"VideoState has no field '{name}'")
+            setattr(state, name, value)
+
+        state.last_access = time.time()
+        self._entries.move_to_end(video_id)
+        self.update_size(video_id)
+        return state
+
+    def update_size(self, video_id):
+        """Re-measure an entry after it was mutated in place (e.g. notes were generated)."""
+        state = self._entries.get(video_id)
+        if state is None:
+            return
+        new_size = estimate_size(state)
+        self.total_bytes += new_size - state.size_bytes
+        state.size_bytes = new_size
+        self._evict(keep=video_id)
+
+    def pop(self, video_id):
+        return self._remove(video_id)
+
+    def _remove(self, video_id):
+        state = self._entries.pop(video_id, None)
+        if state is not None:
+            self.total_bytes -= state.size_bytes
+        return state
+
+    def _evict(self, keep=None):
+        """Drop expired entries, then least-recently-used ones until both bounds hold."""
+        now = time.time()
+        for video_id in [vid for vid, state in self._entries.items() if state.is_expired(now)]:
+            self._remove(video_id)
+            self.expirations += 1
+
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            video_id = next(iter(self._entries))
+            if video_id == keep:
+                # Never evict the entry being written; it is the most recent by definition
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(video_id)
+                video_id = next(iter(self._entries))
+            state = self._remove(video_id)
+            self.evictions += 1
+            print(f"🧹 Evicted {video_id} from video cache ({state.size_bytes} bytes)")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def entries(self):
+        """Per-entry summary in LRU order (least recently used first)."""
+        now = time.time()
+        return [
+            {
+                "video_id": video_id,
+                "size_bytes": state.size_bytes,
+                "has_transcript": state.transcript_store is not None,
+                "has_index": state.vector_store is not None,
+                "has_metadata": state.metadata is not None,
+                "age_seconds": round(now - state.created_at, 1),
+                "idle_seconds": round(now - state.last_access, 1),
+                "expires_in_seconds": round(state.expires_at - now, 1) if state.expires_at else None
+            }
+            for video_id, state in self._entries.items()
+        ]
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Component Registry ---
+class _Component:
+    def __init__(self, name, factory, pool_size):
+        self.name = name
+        self.factory = factory
+        self.pool_size = pool_size  # None for one shared instance
+        self.instance = None
+        self.idle = queue.LifoQueue()  # Most recently returned first, so warm objects are reused
+        self.reserved = 0  # Pool slots taken by built or building instances
+        self.built = 0
+        self.build_ms = 0.0
+        self.uses = 0
+        self.waits = 0
+
+class ComponentRegistry:
+    """
+    Builds heavy objects (LLM chains, CrewAI crews, yt-dlp clients) once and reuses them.
+
+    register() a factory with pool_size=None for objects that are safe to share: get()
+    builds the single instance on first use. Objects that keep per-call state get a
+    pool_size instead and are borrowed with `with registry.lease(name) as obj:`; up to
+    pool_size instances are built on demand and further borrowers wait for one to come back.
+    Thread-safe, since the blocking users run through asyncio.to_thread.
+    """
+    def __init__(self):
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, pool_size=None):
+        self._components[name] = _Component(name, factory, pool_size)
+
+    def _build(self, component):
+        start = time.perf_counter()
+        instance = component.factory()
+        component.build_ms += (time.perf_counter() - start) * 1000
+        component.built += 1
+        print(f"🧱 Built {component.name} ({component.built}/{component.pool_size or 1})")
+        return instance
+
+    def get(self, name):
+        """The shared instance of a component registered without a pool."""
+        component = self._components[name]
+        if component.pool_size is not None:
+            raise ValueError(f"{name} is pooled; borrow it with lease()")
+        if component.instance is None:
+            with self._lock:
+                if component.instance is None:
+                    component.instance = self._build(component)
+        component.uses += 1
+        return component.instance
+
+    @contextmanager
+    def lease(self, name):
+        """Borrow a pooled instance for the duration of the with block."""
+        component = self._components[name]
+        if component.pool_size is None:
+            raise ValueError(f"{name} is shared; use get()")
+        try:
+            instance = component.idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                build = component.reserved < component.pool_size
+                if build:
+                    component.reserved += 1
+            if build:
+                try:
+                    instance = self._build(component)
+                except Exception:
+                    with self._lock:
+                        component.reserved -= 1
+                    raise
+            else:
+                component.waits += 1
+                instance = component.idle.get()
+        component.uses += 1
+        try:
+            yield instance
+        finally:
+            component.idle.put(instance)
+
+    def close(self):
+        """Close every built instance that has a close() method."""
+        for component in self._components.values():
+            instances = [component.instance] if component.instance is not None else []
+            while True:
+                try:
+                    instances.append(component.idle.get_nowait())
+                except queue.Empty:
+                    break
+            for instance in instances:
+                close = getattr(instance, "close", None)
+                if callable(close):
+                    close()
+            component.instance = None
+            component.reserved = 0
+
+    def stats(self):
+        return {
+            name: {
+                "pool_size": component.pool_size,
+                "built": component.built,
+                "idle": component.idle.qsize() if component.pool_size is not None else None,
+                "uses": component.uses,
+                "waits": component.waits,
+                "build_ms": round(component.build_ms, 1)
+            }
+            for name, component in self._components.items()
+        }
@@ -1,4 +1,5 @@
 import asyncio
+import json
 from crewai import Crew, Agent, Task
 from dotenv import load_dotenv
 import os
@@ -15,29 +16,37 @@ try:
 except Exception as e:
     llm = None
 
-# --- Translator Agent ---
-translator = Agent(
-    role="Language Translator",
-    goal="Accurately translate text from any language to English while preserving meaning and context.",
-    backstory="A multilingual expert with deep linguistic knowledge, ensuring accurate and context-aware translations.",
-    verbose=False,
-    memory=True,
-    allow_delegation=False,
-    llm=llm
-)
-
-# --- Translation Task ---
-translate_task = Task(
-    description="Translate the given {text} from any language into English, maintaining the original meaning, tone, and context.",
-    expected_output="The text accurately translated into English with no loss of meaning.",
-    agent=translator
-)
-
-# --- Crew Setup ---
-translation_crew = Crew(
-    agents=[translator],
-    tasks=[translate_task]
-)
+# CrewAI's kickoff() writes its inputs into the Agent and Task objects it runs, so a crew
+# must never run twice at once. Each call builds its own crew in the worker thread; that
+# takes about a millisecond, next to seconds for the LLM call itself.
+
+# --- English Translation Crew ---
+def build_translation_crew():
+    """Crew translating {text} into English."""
+    translator = Agent(
+        role="Language Translator",
+        goal="Accurately translate text from any language to English while preserving meaning and context.",
+        backstory="A multilingual expert with deep linguistic knowledge, ensuring accurate and context-aware translations.",
+        verbose=False,
+        memory=True,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    translate_task = Task(
+        description="Translate the given {text} from any language into English, maintaining the original meaning, tone, and context.",
+        expected_output="The text accurately translated into English with no loss of meaning.",
+        agent=translator
+    )
+
+    return Crew(
+        agents=[translator],
+        tasks=[translate_task]
+    )
+
+def _kickoff(build_crew, inputs):
+    """Run a freshly built crew; blocking, so call it through asyncio.to_thread."""
+    return build_crew().kickoff(inputs=inputs)
 
 # --- Optimized Asynchronous Function to Translate Text ---
 async def translate_to_english(text):
@@ -49,7 +58,7 @@ async def translate_to_english(text):
     chunks = [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
     
     # Create async tasks for each chunk
-    tasks = [asyncio.to_thread(translation_crew.kickoff, inputs={'text': chunk}) for chunk in chunks]
+    tasks = [asyncio.to_thread(_kickoff, build_translation_crew, {'text': chunk}) for chunk in chunks]
     
     # Run all translation tasks in parallel
     results = await asyncio.gather(*tasks)
@@ -69,42 +78,103 @@ async def count_words_and_translate(text):
     return await translate_to_english(text)
 
 # --- Translator Agent ---
-translation_agent = Agent(
-    role="Context-Aware Translator",
-    goal="Translate the given segment from {source_language} to {target_language} while keeping its meaning the same, "
-         "using the whole English transcript as a reference. The translated segment must have the same number of words.",
-    backstory="A linguistics expert with deep experience in contextual translation, ensuring accuracy while maintaining structure.",
-    verbose=False,
-    memory=True,
-    allow_delegation=False,
-    llm=llm
-)
-
-# --- Translation Task ---
-translation_task = Task(
-    description="Translate the given segment '{segment}' from {source_language} to {target_language} using "
-                "the whole transcript '{whole_transcript}' as context which is in english. "
-                "Ensure the translated text conveys the same meaning and has the same word count.",
-    expected_output="A translated version of the segment in {target_language}, maintaining the same number of words and meaning.",
-    agent=translation_agent
-)
-
-# --- Crew Setup ---
-translation_crew_segment = Crew(
-    agents=[translation_agent],
-    tasks=[translation_task]
-)
+def build_translation_agent():
+    return Agent(
+        role="Context-Aware Translator",
+        goal="Translate the given segment from {source_language} to {target_language} while keeping its meaning the same, "
+             "using the whole English transcript as a reference. The translated segment must have the same number of words.",
+        backstory="A linguistics expert with deep experience in contextual translation, ensuring accuracy while maintaining structure.",
+        verbose=False,
+        memory=True,
+        allow_delegation=False,
+        llm=llm
+    )
+
+# --- Segment Translation Crew ---
+def build_segment_translation_crew():
+    """Crew translating one {segment} with the whole transcript as context."""
+    translation_agent = build_translation_agent()
+    translation_task = Task(
+        description="Translate the given segment '{segment}' from {source_language} to {target_language} using "
+                    "the whole transcript '{whole_transcript}' as context which is in english. "
+                    "Ensure the translated text conveys the same meaning and has the same word count.",
+        expected_output="A translated version of the segment in {target_language}, maintaining the same number of words and meaning.",
+        agent=translation_agent
+    )
+
+    return Crew(
+        agents=[translation_agent],
+        tasks=[translation_task]
+    )
 
 # --- Asynchronous Function to Translate Segments ---
 async def translate_segment(whole_transcript, segment, source_language, target_language):
     """Translates a segment while preserving meaning and word count using the full transcript as context."""
     result = await asyncio.to_thread(
-        translation_crew_segment.kickoff,
-        inputs={
+        _kickoff,
+        build_segment_translation_crew,
+        {
             'whole_transcript': whole_transcript,
             'segment': segment,
             'source_language': source_language,
             'target_language': target_language
         }
     )
-    return result.raw  # Extracting only the translated output
\ No newline at end of file
+    return result.raw  # Extracting only the translated output
+
+# --- Batch Translation Crew ---
+def build_batch_translation_crew():
+    """Crew translating a JSON list of consecutive {segments} in one call."""
+    translation_agent = build_translation_agent()
+    batch_translation_task = Task(
+        description="Translate each segment in the JSON list {segments} from {source_language} to {target_language}. "
+                    "The segments are consecutive lines of one video; use the English transcript excerpt '{context}' "
+                    "as shared context. Keep each segment's meaning and word count, and never merge or split segments.",
+        expected_output="Only a JSON object mapping every segment id (as a string) to its translation in {target_language}, "
+                        "with no other text.",
+        agent=translation_agent
+    )
+
+    return Crew(
+        agents=[translation_agent],
+        tasks=[batch_translation_task]
+    )
+
+def parse_batch_translation(raw, expected_ids):
+    """Split a batch response back into per-segment translations; raises ValueError if it is malformed."""
+    # Models often wrap JSON in prose or code fences; take the outermost object
+    text = raw.strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end == -1:
+        raise ValueError("no JSON object in batch translation")
+    translations = json.loads(text[start:end + 1])
+    if not isinstance(translations, dict):
+        raise ValueError("batch translation is not a JSON object")
+
+    result = []
+    for segment_id in expected_ids:
+        translated = translations.get(str(segment_id))
+        if not isinstance(translated, str) or not translated.strip():
+            raise ValueError(f"missing translation for segment {segment_id}")
+        result.append(translated.strip())
+    return result
+
+# --- Asynchronous Function to Translate Contiguous Segments in One Call ---
+async def translate_segments_batch(context, segments, source_language, target_language):
+    """
+    Translates consecutive segments with one LLM call and shared context.
+    segments is a list of (id, text); returns the translations in the same order.
+    Raises ValueError if the response cannot be split back per segment.
+    """
+    payload = json.dumps([{"id": str(segment_id), "text": text} for segment_id, text in segments], ensure_ascii=False)
+    result = await asyncio.to_thread(
+        _kickoff,
+        build_batch_translation_crew,
+        {
+            'context': context,
+            'segments': payload,
+            'source_language': source_language,
+            'target_language': target_language
+        }
+    )
+    return parse_batch_translation(result.raw, [segment_id for segment_id, _ in segments])
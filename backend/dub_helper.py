@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import time
+
+DUB_ROOT = os.path.join("data", "dubs")
+DUB_FORMAT_VERSION = 1
+
+# --- MP3 Frames ---
+# One silent MPEG-2 Layer III frame matching edge-tts output (24 kHz, 48 kbps, mono):
+# header FF F3 64 C0, then all-zero side info and main data. 144 bytes = 576 samples = 24 ms.
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC0]) + bytes(140)
+SILENT_FRAME_SECONDS = 576 / 24000
+
+_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def _skip_id3(data):
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return 10 + size
+    return 0
+
+def mp3_frames(data):
+    """Yield (offset, length, seconds) for each MPEG Layer III frame in data, resyncing past junk bytes."""
+    pos = _skip_id3(data)
+    end = len(data)
+    while pos + 4 <= end:
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version = (b1 >> 3) & 0x03
+        layer = (b1 >> 1) & 0x03
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 0x03
+        if (data[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or version == 1 or layer != 1
+                or bitrate_index in (0, 15) or rate_index == 3):
+            pos += 1
+            continue
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 0x01
+        if version == 3:
+            length = 144 * _BITRATES_V1[bitrate_index] * 1000 // sample_rate + padding
+            samples = 1152
+        else:
+            length = 72 * _BITRATES_V2[bitrate_index] * 1000 // sample_rate + padding
+            samples = 576
+        if pos + length > end:
+            break
+        yield pos, length, samples / sample_rate
+        pos += length
+
+# --- Track Rendering ---
+def dub_paths(video_id, lang):
+    path = os.path.join(DUB_ROOT, video_id, lang)
+    return path, os.path.join(path, "track.mp3"), os.path.join(path, "index.json")
+
+def render_track(video_id, lang, segment_files, starts, ends):
+    """
+    Concatenate per-segment MP3s into one time-aligned track and write its seek index.
+
+    Each segment is placed at its transcript start by padding with silent frames. A segment
+    that runs past the next start pushes the following ones back, and that drift is absorbed
+    by later gaps. Missing segments are left silent. Blocking; call via asyncio.to_thread.
+    """
+    path, track_path, index_path = dub_paths(video_id, lang)
+    os.makedirs(path, exist_ok=True)
+
+    entries = []
+    cursor = 0.0  # Seconds written so far
+    offset = 0  # Bytes written so far
+    with open(track_path + ".tmp", "wb") as track:
+        for i, segment_file in enumerate(segment_files):
+            pad_frames = max(0, round((starts[i] - cursor) / SILENT_FRAME_SECONDS))
+            if pad_frames:
+                track.write(SILENT_FRAME * pad_frames)
+                cursor += pad_frames * SILENT_FRAME_SECONDS
+                offset += pad_frames * len(SILENT_FRAME)
+
+            entry = {
+                "segment": i + 1,
+                "start": starts[i],
+                "end": ends[i],
+                "track_start": round(cursor, 3),
+                "byte_offset": offset,
+                "missing": True
+            }
+            data = None
+            if segment_file is not None:
+                try:
+                    with open(segment_file, "rb") as f:
+                        data = f.read()
+                except OSError as e:
+                    print(f"⚠ Segment {i + 1} audio unreadable, leaving it silent: {str(e)}")
+            if data is not None:
+                entry["missing"] = False
+                for frame_offset, length, seconds in mp3_frames(data):
+                    track.write(data[frame_offset:frame_offset + length])
+                    cursor += seconds
+                    offset += length
+            entry["track_end"] = round(cursor, 3)
+            entry["byte_length"] = offset - entry["byte_offset"]
+            entry["drift"] = round(entry["track_start"] - starts[i], 3)
+            entries.append(entry)
+
+    index = {
+        "version": DUB_FORMAT_VERSION,
+        "video_id": video_id,
+        "language": lang,
+        "duration": round(cursor, 3),
+        "bytes": offset,
+        "segments": entries
+    }
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(track_path + ".tmp", track_path)
+    os.replace(index_path + ".tmp", index_path)
+    return index
+
+def load_dub_index(video_id, lang):
+    """The index of a rendered track, or None if there is no current rendering."""
+    _, track_path, index_path = dub_paths(video_id, lang)
+    if not (os.path.exists(track_path) and os.path.exists(index_path)):
+        return None
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("version") == DUB_FORMAT_VERSION else None
+
+# --- Dub Jobs ---
+class DubJob:
+    """
+    Renders one (video_id, language) dub through bounded pipeline stages.
+
+    A single translate stage feeds batches of segment dicts into a bounded queue drained
+    by `tts_workers` synthesis workers, so translation runs ahead of TTS by at most
+    `queue_size` segments. Once every segment has audio, the track is rendered.
+    """
+    def __init__(self, video_id, lang, segment_count, translate, synthesize, cached_path, after_audio=None,
+                 translate_batch_size=16, tts_workers=4, queue_size=32):
+        self.video_id = video_id
+        self.lang = lang
+        self.segment_count = segment_count
+        self.translate = translate  # async (segment_numbers) -> segment dicts for the uncached ones
+        self.synthesize = synthesize  # async (segment dict) -> None, adds the audio to the cache
+        self.cached_path = cached_path  # (segment_no) -> cached file path or None
+        self.after_audio = after_audio  # optional async () -> None, run once all audio exists
+        self.translate_batch_size = translate_batch_size
+        self.tts_workers = tts_workers
+        self.queue_size = queue_size
+        self.status = "queued"
+        self.error = None
+        self.pending = 0
+        self.translated = 0
+        self.synthesized = 0
+        self.missing = 0
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    async def run(self, starts, ends):
+        self.status = "running"
+        self.started_at = time.time()
+        try:
+            missing = [n for n in range(1, self.segment_count + 1) if self.cached_path(n) is None]
+            self.pending = len(missing)
+            await self._produce_audio(missing)
+            if self.after_audio is not None:
+                await self.after_audio()
+
+            self.status = "rendering"
+            segment_files = [self.cached_path(n) for n in range(1, self.segment_count + 1)]
+            self.missing = sum(1 for path in segment_files if path is None)
+            await asyncio.to_thread(render_track, self.video_id, self.lang, segment_files, starts, ends)
+            self.status = "done"
+            print(f"🎬 Dub ready for {self.video_id} ({self.lang}): {self.segment_count} segments, {self.missing} missing")
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"❌ Dub failed for {self.video_id} ({self.lang}): {str(e)}")
+        finally:
+            self.finished_at = time.time()
+
+    async def _produce_audio(self, segment_numbers):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def translate_stage():
+            for i in range(0, len(segment_numbers), self.translate_batch_size):
+                batch = segment_numbers[i:i + self.translate_batch_size]
+                for segment in await self.translate(batch):
+                    await queue.put(segment)  # Blocks while TTS is queue_size segments behind
+                self.translated += len(batch)
+            for _ in range(self.tts_workers):
+                await queue.put(None)
+
+        async def synthesis_stage():
+            while (segment := await queue.get()) is not None:
+                await self.synthesize(segment)
+                self.synthesized += 1
+
+        tasks = [asyncio.create_task(translate_stage())]
+        tasks += [asyncio.create_task(synthesis_stage()) for _ in range(self.tts_workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def progress(self):
+        return {
+            "video_id": self.video_id,
+            "language": self.lang,
+            "status": self.status,
+            "error": self.error,
+            "segments": self.segment_count,
+            "pending": self.pending,
+            "translated": self.translated,
+            "synthesized": self.synthesized,
+            "missing": self.missing,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else None
+        }
+
+class DubJobManager:
+    """
+    Runs at most max_jobs dub jobs at once; a second request for the same dub attaches to the running job.
+    Finished jobs are forgotten after retention_seconds.
+    """
+    def __init__(self, max_jobs=1, retention_seconds=3600):
+        self.max_jobs = max_jobs
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._semaphore = None
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for key in [key for key, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[key]
+
+    def get(self, video_id, lang):
+        self._prune()
+        return self._jobs.get((video_id, lang))
+
+    def start(self, job, starts, ends):
+        self._prune()
+        key = (job.video_id, job.lang)
+        existing = self._jobs.get(key)
+        if existing is not None and existing.status in ("queued", "running", "rendering"):
+            return existing
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_jobs)
+
+        async def run_bounded():
+            async with self._semaphore:
+                await job.run(starts, ends)
+
+        self._jobs[key] = job
+        job.task = asyncio.create_task(run_bounded())
+        return job
+
+    def stats(self):
+        self._prune()
+        return [job.progress() for job in self._jobs.values()]
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_DB_PATH = os.path.join("data", "embeddings.db")
+
+def embedding_key(model_name, text):
+    """Content address of an embedding: hash of the model namespace and the exact text."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+# --- Cached Embeddings ---
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that caches vectors by hash(model, text).
+
+    Lookups go to a bounded in-memory LRU first, then to a SQLite table of
+    float32 blobs, and only misses are sent to the wrapped embedding model.
+    Queries and documents are cached separately because providers such as
+    Gemini embed them with different task types.
+
+    Used from worker threads and the event loop at once, so the memory tier,
+    the SQLite connection and the counters are all guarded by one lock.
+    """
+    def __init__(self, embeddings, model_name, path=EMBEDDING_DB_PATH, max_memory_items=10000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key, vector):
+        """Insert into the memory tier; the caller holds self._lock."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys):
+        """Return {key: float32 vector} for every key found in memory or on disk."""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+        for start in range(0, len(missing), 500):
+            batch = missing[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+        return found
+
+    def _store(self, items):
+        """Persist (key, vector) pairs as float32 blobs, keep them in memory and return them by key."""
+        stored = {}
+        rows = []
+        for key, vector in items:
+            vector = np.asarray(vector, dtype=np.float32)
+            stored[key] = vector
+            rows.append((key, int(vector.shape[0]), vector.tobytes()))
+        with self._lock:
+            for key, vector in stored.items():
+                self._remember(key, vector)
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+        return stored
+
+    def embed_documents(self, texts):
+        namespace = f"{self.model_name}:document"
+        keys = [embedding_key(namespace, text) for text in texts]
+        found = self._lookup(dict.fromkeys(keys))
+
+        # Embed each distinct missing text once, even if it repeats in this batch
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            found.update(self._store(zip(missing.keys(), vectors)))
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text):
+        key = embedding_key(f"{self.model_name}:query", text)
+        found = self._lookup([key])
+        if key not in found:
+            with self._lock:
+                self.misses += 1
+            found.update(self._store([(key, self.embeddings.embed_query(text))]))
+        return found[key].tolist()
+
+    def stats(self):
+        with self._lock:
+            memory_items, memory_hits, disk_hits, misses = len(self._memory), self.memory_hits, self.disk_hits, self.misses
+        lookups = memory_hits + disk_hits + misses
+        return {
+            "memory_items": memory_items,
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_ratio": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0
+        }
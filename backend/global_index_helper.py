@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+from array import array
+import numpy as np
+import faiss
+
+GLOBAL_INDEX_ROOT = os.path.join("data", "global_index")
+
+# Filters selecting at most this many vectors are answered by an exact scan of
+# their id ranges; HNSW graph search degrades badly under very selective filters.
+EXACT_SCAN_LIMIT = 4096
+
+# --- Global Vector Index ---
+class GlobalVectorIndex:
+    """
+    One HNSW FAISS index over the transcript chunks of every video.
+
+    Each video's chunks are added together, so they occupy one contiguous
+    range of vector ids. Compact parallel arrays map a vector id to its
+    video (as an ordinal into video_ids), chunk number and chunk start/end.
+    Searches can be restricted to a set of videos through their id ranges.
+    """
+    def __init__(self, path=GLOBAL_INDEX_ROOT, hnsw_m=32, ef_construction=80, ef_search=64):
+        self.path = path
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+        self.video_ids = []  # Video ordinal -> video_id
+        self.video_ranges = {}  # video_id -> (first vector id, end vector id)
+        self.vector_video = array('i')  # Vector id -> video ordinal
+        self.vector_chunk = array('i')  # Vector id -> chunk number within its video
+        self.chunk_start = array('f')  # Vector id -> chunk start (seconds)
+        self.chunk_end = array('f')  # Vector id -> chunk end (seconds)
+        self.texts = []  # Vector id -> chunk text
+        self.live_vectors = 0
+        self._video_ordinals = {}
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # One writer at a time, so snapshots land in order
+        self._dirty = False
+        self._last_save = time.time()
+
+    def __contains__(self, video_id):
+        return video_id in self.video_ranges
+
+    def __len__(self):
+        return 0 if self.index is None else self.index.ntotal
+
+    def _new_index(self, dim):
+        index = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+        index.hnsw.efConstruction = self.ef_construction
+        index.hnsw.efSearch = self.ef_search
+        return index
+
+    # --- Adding Videos ---
+    def add_video(self, video_id, vectors, chunks):
+        """
+        Append one video's chunk vectors. chunks is a list of dicts with Text and
+        numeric start/end seconds (keys "start"/"end"), aligned with vectors.
+        Re-adding a video supersedes its old range; stale vectors are filtered out.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            return
+        with self._lock:
+            if self.index is None:
+                self.index = self._new_index(vectors.shape[1])
+
+            ordinal = self._video_ordinals.get(video_id)
+            if ordinal is None:
+                ordinal = len(self.video_ids)
+                self.video_ids.append(video_id)
+                self._video_ordinals[video_id] = ordinal
+
+            first_id = self.index.ntotal
+            self.index.add(vectors)
+            for chunk_no, chunk in enumerate(chunks):
+                self.vector_video.append(ordinal)
+                self.vector_chunk.append(chunk_no)
+                self.chunk_start.append(float(chunk.get("start", 0.0)))
+                self.chunk_end.append(float(chunk.get("end", 0.0)))
+                self.texts.append(chunk["Text"])
+            if video_id in self.video_ranges:
+                old_first, old_end = self.video_ranges[video_id]
+                self.live_vectors -= old_end - old_first
+            self.video_ranges[video_id] = (first_id, self.index.ntotal)
+            self.live_vectors += self.index.ntotal - first_id
+            self._dirty = True
+
+    # --- Searching ---
+    def _hit(self, vector_id, distance):
+        return {
+            "video_id": self.video_ids[self.vector_video[vector_id]],
+            "chunk": self.vector_chunk[vector_id],
+            "start": round(self.chunk_start[vector_id], 2),
+            "end": round(self.chunk_end[vector_id], 2),
+            "text": self.texts[vector_id],
+            "similarity": 1 - float(distance)
+        }
+
+    def _is_live(self, vector_id):
+        first_id, end_id = self.video_ranges[self.video_ids[self.vector_video[vector_id]]]
+        return first_id <= vector_id < end_id
+
+    def _exact_search(self, query, ranges, k):
+        """Brute-force L2 search over the given id ranges."""
+        ids = np.concatenate([np.arange(first_id, end_id) for first_id, end_id in ranges])
+        vectors = np.vstack([self.index.reconstruct_n(first_id, end_id - first_id) for first_id, end_id in ranges])
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        top = np.argsort(distances)[:k]
+        return [(int(ids[i]), float(distances[i])) for i in top]
+
+    def search(self, query_vector, k=3, video_ids=None):
+        """
+        Return the k nearest live chunks as dicts (video_id, chunk, start, end, text, similarity).
+        If video_ids is given only those videos are searched.
+        """
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+
+            if video_ids is not None:
+                ranges = [self.video_ranges[video_id] for video_id in video_ids if video_id in self.video_ranges]
+                if not ranges:
+                    return []
+                if sum(end_id - first_id for first_id, end_id in ranges) <= EXACT_SCAN_LIMIT:
+                    return [self._hit(i, d) for i, d in self._exact_search(query[0], ranges, k)]
+
+                selector = faiss.IDSelectorBatch(np.concatenate([np.arange(a, b) for a, b in ranges]).astype(np.int64))
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(self.ef_search, k))
+                distances, ids = self.index.search(query, k, params=params)
+            else:
+                # Over-fetch when superseded vectors exist so dropping them does not starve the result
+                fetch = k if self.live_vectors == self.index.ntotal else k * 4
+                distances, ids = self.index.search(query, fetch)
+
+            hits = []
+            for vector_id, distance in zip(ids[0], distances[0]):
+                if vector_id < 0 or not self._is_live(int(vector_id)):
+                    continue
+                hits.append(self._hit(int(vector_id), distance))
+                if len(hits) == k:
+                    break
+            return hits
+
+    # --- Persistence ---
+    def save(self):
+        """
+        Write the index and its metadata arrays under self.path. Only copying a snapshot holds
+        the index lock, so searches and additions carry on while the files are written.
+        """
+        with self._save_lock:
+            with self._lock:
+                if self.index is None:
+                    return
+                serialized = faiss.serialize_index(self.index)
+                meta = {
+                    "vector_video": np.frombuffer(self.vector_video, dtype=np.int32).copy(),
+                    "vector_chunk": np.frombuffer(self.vector_chunk, dtype=np.int32).copy(),
+                    "chunk_start": np.frombuffer(self.chunk_start, dtype=np.float32).copy(),
+                    "chunk_end": np.frombuffer(self.chunk_end, dtype=np.float32).copy()
+                }
+                videos = {"video_ids": list(self.video_ids), "video_ranges": dict(self.video_ranges)}
+                texts = list(self.texts)
+                self._dirty = False
+
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                index_path = os.path.join(self.path, "index.faiss")
+                meta_path = os.path.join(self.path, "meta.npz")
+                videos_path = os.path.join(self.path, "videos.json")
+                texts_path = os.path.join(self.path, "texts.json")
+
+                with open(index_path + ".tmp", "wb") as f:
+                    f.write(serialized.tobytes())
+                with open(meta_path + ".tmp", "wb") as f:
+                    np.savez(f, **meta)
+                with open(videos_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(videos, f)
+                with open(texts_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(texts, f, ensure_ascii=False)
+
+                for path in (index_path, meta_path, videos_path, texts_path):
+                    os.replace(path + ".tmp", path)
+            except Exception:
+                self._dirty = True  # Retried on the next save
+                raise
+            self._last_save = time.time()
+
+    def maybe_save(self, min_interval=60):
+        """Save if there are unsaved additions and the last save is older than min_interval seconds."""
+        if self._dirty and time.time() - self._last_save >= min_interval:
+            self.save()
+
+    @classmethod
+    def load(cls, path=GLOBAL_INDEX_ROOT, **kwargs):
+        """Load a saved global index, or return an empty one if nothing is saved yet."""
+        global_index = cls(path=path, **kwargs)
+        index_path = os.path.join(path, "index.faiss")
+        if not os.path.exists(index_path):
+            return global_index
+
+        global_index.index = faiss.read_index(index_path)
+        global_index.index.hnsw.efSearch = global_index.ef_search
+        meta = np.load(os.path.join(path, "meta.npz"))
+        global_index.vector_video = array('i', meta["vector_video"].tobytes())
+        global_index.vector_chunk = array('i', meta["vector_chunk"].tobytes())
+        global_index.chunk_start = array('f', meta["chunk_start"].tobytes())
+        global_index.chunk_end = array('f', meta["chunk_end"].tobytes())
+        with open(os.path.join(path, "videos.json"), encoding="utf-8") as f:
+            videos = json.load(f)
+        global_index.video_ids = videos["video_ids"]
+        global_index.video_ranges = {video_id: tuple(r) for video_id, r in videos["video_ranges"].items()}
+        global_index._video_ordinals = {video_id: i for i, video_id in enumerate(global_index.video_ids)}
+        global_index.live_vectors = sum(end_id - first_id for first_id, end_id in global_index.video_ranges.values())
+        with open(os.path.join(path, "texts.json"), encoding="utf-8") as f:
+            global_index.texts = json.load(f)
+        print(f"💾 Loaded global index with {global_index.index.ntotal} vectors over {len(global_index.video_ranges)} videos")
+        return global_index
+
+    def stats(self):
+        return {
+            "videos": len(self.video_ranges),
+            "vectors": len(self),
+            "live_vectors": self.live_vectors
+        }
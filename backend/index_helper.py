@@ -0,0 +1,81 @@
+import json
+import os
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain.schema import Document
+
+INDEX_ROOT = os.path.join("data", "indexes")
+INDEX_FORMAT_VERSION = 2
+
+def _index_paths(video_id):
+    path = os.path.join(INDEX_ROOT, video_id)
+    return path, os.path.join(path, "index.faiss"), os.path.join(path, "docstore.json")
+
+def _mmap_flags():
+    """Read flags that map the index file instead of copying it into each worker's heap."""
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    # Newer FAISS builds can also map flat (IndexFlatCodes) storage
+    return flags | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+# --- Save ---
+def save_vector_store(video_id, vector_store, model_name):
+    """Write a LangChain FAISS store's index and docstore to disk under data/indexes/<video_id>."""
+    path, index_path, docstore_path = _index_paths(video_id)
+    os.makedirs(path, exist_ok=True)
+
+    ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+    documents = []
+    for doc_id in ids:
+        doc = vector_store.docstore.search(doc_id)
+        documents.append({"page_content": doc.page_content, "metadata": doc.metadata})
+
+    # Write to temporary files first so a crash never leaves a half-written index behind
+    faiss.write_index(vector_store.index, index_path + ".tmp")
+    with open(docstore_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": INDEX_FORMAT_VERSION,
+            "embedding_model": model_name,
+            "ids": ids,
+            "documents": documents
+        }, f, ensure_ascii=False)
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(docstore_path + ".tmp", docstore_path)
+
+# --- Load ---
+def has_vector_store(video_id):
+    _, index_path, docstore_path = _index_paths(video_id)
+    return os.path.exists(index_path) and os.path.exists(docstore_path)
+
+def load_vector_store(video_id, embeddings, model_name):
+    """
+    Load a persisted FAISS store, memory-mapping the index where the index type allows it.
+    Returns None if nothing is stored or the stored index was built differently.
+    """
+    if not has_vector_store(video_id):
+        return None
+    _, index_path, docstore_path = _index_paths(video_id)
+
+    with open(docstore_path, encoding="utf-8") as f:
+        stored = json.load(f)
+    if stored.get("version") != INDEX_FORMAT_VERSION or stored.get("embedding_model") != model_name:
+        print(f"♻️ Ignoring outdated FAISS index on disk for video: {video_id}")
+        return None
+
+    try:
+        index = faiss.read_index(index_path, _mmap_flags())
+    except RuntimeError as e:
+        print(f"⚠ Could not memory-map FAISS index for {video_id}, reading into memory: {str(e)}")
+        index = faiss.read_index(index_path)
+
+    ids = stored["ids"]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=doc["page_content"], metadata=doc["metadata"])
+        for doc_id, doc in zip(ids, stored["documents"])
+    })
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids))
+    )
@@ -0,0 +1,151 @@
+import asyncio
+import time
+import uuid
+
+# --- Background Jobs ---
+class Job:
+    """
+    One background generation job with progress and partial output.
+
+    Runners report work with add_total() and part_done(); parts are kept by a sortable
+    key so partial output is always in document order, whatever order parts finish in.
+    """
+    def __init__(self, video_id, mode):
+        self.id = uuid.uuid4().hex
+        self.video_id = video_id
+        self.mode = mode
+        self.status = "queued"
+        self.total = 0
+        self.done = 0
+        self.parts = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+        self.depends_on = None  # Job whose output this one consumes (e.g. summary waiting on notes)
+
+    def add_total(self, count):
+        self.total += count
+
+    def part_done(self, key, text):
+        self.parts[key] = text
+        self.done += 1
+
+    def step_done(self):
+        """Count finished work that has no output of its own to show (e.g. an intermediate merge)."""
+        self.done += 1
+
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    def partial_output(self):
+        return "\n\n".join(self.parts[key] for key in sorted(self.parts))
+
+    def progress(self, include_output=True):
+        done, total = self.done, self.total
+        if self.depends_on is not None:
+            done += self.depends_on.done
+            total += self.depends_on.total
+        progress = {
+            "job_id": self.id,
+            "video_id": self.video_id,
+            "mode": self.mode,
+            "status": self.status,
+            "done": done,
+            "total": total,
+            "error": self.error,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 1)
+        }
+        if include_output:
+            if self.status == "done":
+                progress["result"] = self.result
+            elif not self.parts and self.depends_on is not None:
+                progress["partial"] = self.depends_on.partial_output()
+            else:
+                progress["partial"] = self.partial_output()
+        return progress
+
+class JobManager:
+    """
+    Starts and tracks jobs keyed by (video_id, mode).
+
+    A request for a (video_id, mode) that already has an active job attaches to it.
+    Finished jobs are kept for retention_seconds so clients can collect the result.
+    Repeated requests for an already available result share one finished job.
+    """
+    def __init__(self, retention_seconds=3600):
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._active = {}
+        self._completed = {}  # (video_id, mode) -> latest job recorded by completed()
+
+    def get(self, job_id):
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def start(self, video_id, mode, runner):
+        """Return the active job for (video_id, mode), or start runner(job) as a new one."""
+        self._prune()
+        job = self._active.get((video_id, mode))
+        if job is not None and job.is_active():
+            print(f"⏳ Attaching to running {mode} job {job.id} for {video_id}")
+            return job
+
+        job = Job(video_id, mode)
+        self._jobs[job.id] = job
+        self._active[(video_id, mode)] = job
+        job.task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    def completed(self, video_id, mode, result):
+        """Record an already available result as a finished job, so clients poll one way."""
+        self._prune()
+        job = self._completed.get((video_id, mode))
+        if job is not None and job.result == result:
+            job.finished_at = time.time()  # Retained for as long as a fresh job would be
+            return job
+
+        job = Job(video_id, mode)
+        job.status = "done"
+        job.result = result
+        job.finished_at = job.created_at
+        self._jobs[job.id] = job
+        self._completed[(video_id, mode)] = job
+        return job
+
+    async def wait(self, job):
+        """Wait for a job's result without cancelling it if the waiting request goes away."""
+        if job.task is not None:
+            await asyncio.shield(job.task)
+        if job.status == "failed":
+            raise RuntimeError(job.error)
+        return job.result
+
+    async def _run(self, job, runner):
+        job.status = "running"
+        try:
+            job.result = await runner(job)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"❌ {job.mode} job {job.id} for {job.video_id} failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+            if self._active.get((job.video_id, job.mode)) is job:
+                del self._active[(job.video_id, job.mode)]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+        for key in [key for key, job in self._completed.items() if job.id not in self._jobs]:
+            del self._completed[key]
+
+    def stats(self):
+        self._prune()
+        return {
+            "jobs": len(self._jobs),
+            "active": [job.progress(include_output=False) for job in self._active.values()]
+        }
@@ -1,27 +1,40 @@
 import time
-from quart import Quart, request, jsonify, send_file
+from quart import Quart, Response, request, jsonify, send_file
 from quart_cors import cors
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 from mistralai import Mistral
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
 from mtranslate import translate
 import json
 import os
-import edge_tts
-from crew_helper import count_words_and_translate, translate_segment
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from crew_helper import count_words_and_translate, translate_segment, translate_segments_batch
+from cache_helper import VideoStateCache
+from store_helper import VideoStore
+from index_helper import save_vector_store, load_vector_store
+from embedding_helper import CachedEmbeddings
+from global_index_helper import GlobalVectorIndex
+from audio_cache_helper import AudioSegmentCache, text_hash
+from prefetch_helper import DubPrefetchScheduler
+from rate_limit_helper import TokenBucket
+from dub_helper import DubJob, DubJobManager, dub_paths, load_dub_index
+from tts_helper import TTS_BACKENDS, create_tts_backend
+from summary_helper import SummarizationEngine
+from job_helper import JobManager
+from answer_cache_helper import AnswerCache
+from component_helper import ComponentRegistry
+from refine_gate_helper import RefinementGate
+from metadata_helper import MetadataService, create_metadata_provider
+from qa_helper import llm_genai, QA_PROMPT, get_conversational_chain, build_refinement_crew, build_yt_dlp
+from transcript_helper import containing_index, chunk_transcript, context_text, span_context_text, format_timestamp, SegmentTable, WordIndex
 import asyncio
 import faiss
 import os
-import yt_dlp
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain.prompts import PromptTemplate
-from langchain.chains.question_answering import load_qa_chain
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
-from crewai import Agent, Task, Crew, LLM, Process
-from crewai_tools import SerperDevTool
 
 # Disable OpenTelemetry tracing if it's causing issues
 try:
@@ -32,26 +45,30 @@ try:
 except ImportError:
     pass
 
-# Voice configurations
+# Voice configurations, one table per TTS backend
 VOICE_CONFIGS = {
-    'en': "en-US-JennyNeural",
-    'hi': "hi-IN-SwaraNeural",
-    'es': "es-MX-JorgeNeural",
-    'fr': "fr-FR-HenriNeural",
-    'de': "de-DE-KillianNeural",
-    'ja': "ja-JP-KeitaNeural",
-    'ko': "ko-KR-SunHiNeural",
-    'zh': "zh-CN-XiaoxiaoNeural",
-    'it': "it-IT-DiegoNeural",
-    'pt': "pt-BR-AntonioNeural",
-    'ru': "ru-RU-DmitryNeural",
-    'nl': "nl-NL-MaartenNeural",
-    'tr': "tr-TR-AhmetNeural",
-    'pl': "pl-PL-MarekNeural",
-    'id': "id-ID-ArdiNeural",
-    'th': "th-TH-NiwatNeural",
-    'vi': "vi-VN-HoaiMyNeural"
+    'edge': {
+        'en': "en-US-JennyNeural",
+        'hi': "hi-IN-SwaraNeural",
+        'es': "es-MX-JorgeNeural",
+        'fr': "fr-FR-HenriNeural",
+        'de': "de-DE-KillianNeural",
+        'ja': "ja-JP-KeitaNeural",
+        'ko': "ko-KR-SunHiNeural",
+        'zh': "zh-CN-XiaoxiaoNeural",
+        'it': "it-IT-DiegoNeural",
+        'pt': "pt-BR-AntonioNeural",
+        'ru': "ru-RU-DmitryNeural",
+        'nl': "nl-NL-MaartenNeural",
+        'tr': "tr-TR-AhmetNeural",
+        'pl': "pl-PL-MarekNeural",
+        'id': "id-ID-ArdiNeural",
+        'th': "th-TH-NiwatNeural",
+        'vi': "vi-VN-HoaiMyNeural"
+    }
 }
+VOICE_CONFIGS['silence'] = {lang: f"silence-{lang}" for lang in VOICE_CONFIGS['edge']}
+DEFAULT_VOICES = {'edge': "en-AU-WilliamNeural", 'silence': "silence-en"}
 
 LANGUAGE_MAP = {
     'en': "English",
@@ -74,14 +91,25 @@ LANGUAGE_MAP = {
 }
 
 # Rate limiting settings 
-RATE_LIMIT_DELAY = 2  # Delay in seconds between API requests
+RATE_LIMIT_DELAY = 2  # Base backoff in seconds after a rate-limited request (doubled per retry, jittered)
 MAX_RETRIES = 3  # Maximum number of retries for failed requests
-MAX_CONCURRENT_REQUESTS = 2  # Limit the number of concurrent requests 
+MAX_CONCURRENT_REQUESTS = 4  # Mistral calls in flight, shared by all notes and summary requests
+SUMMARY_CHUNK_TOKENS = 2000  # Estimated tokens per notes/summary chunk, split on sentence boundaries
+SUMMARY_FAN_IN = 4  # Summaries merged per call when reducing chunk summaries to one
+SUMMARY_CACHE_ENTRIES = 4096  # Cached summary tree node outputs
 
 # Initialize Mistral client
 api_key = os.environ.get("MISTRAL_API_KEY") # Replace with your actual API key
 model = "mistral-large-latest"
 client = Mistral(api_key=api_key)
+summarizer = SummarizationEngine(client, model, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                                 max_retries=MAX_RETRIES, base_delay=RATE_LIMIT_DELAY,
+                                 chunk_tokens=SUMMARY_CHUNK_TOKENS, fan_in=SUMMARY_FAN_IN,
+                                 cache_entries=SUMMARY_CACHE_ENTRIES)
+
+# Background notes/summary jobs
+JOB_RETENTION = 3600  # Seconds a finished job's result stays available for polling
+generation_jobs = JobManager(retention_seconds=JOB_RETENTION)
 
 # Initialize environment variables
 os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
@@ -89,120 +117,196 @@ os.environ["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE" 
 os.environ["SERPER_API_KEY"] = os.getenv("SERPER_API_KEY", "")
 
-# Initialize models and tools
-llm = LLM(model="gemini/gemini-1.5-flash")
-llm_genai = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.4)
-embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-serper_tool = SerperDevTool()
+# Initialize models (the QA and refinement models live in qa_helper)
+EMBEDDING_MODEL_NAME = "models/embedding-001"
+embedding_model = CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL_NAME), EMBEDDING_MODEL_NAME)
 
 # Constants
 SIMILARITY_THRESHOLD = 0.3
-
-# In-memory storage for both FAISS indexes and metadata
-index_cache = {}  # For storing FAISS vector stores
-metadata_cache = {}  # For storing transcript, channel, title
-
-def format_timestamp(seconds):
-    """Convert seconds to HH:MM:SS format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = int(seconds % 60)
-
-    if hours > 0:
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{minutes:02d}:{seconds+1:02d}"
+RETRIEVAL_TOP_K = 3  # Number of chunks retrieved and passed to the QA chain
+
+# Video state cache settings
+VIDEO_CACHE_MAX_ENTRIES = 64  # Maximum number of videos kept in memory
+VIDEO_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Approximate memory budget for all cached videos
+VIDEO_CACHE_TTL = 6 * 3600  # Seconds before a cached video is dropped
+
+# In-memory storage for transcript stores, FAISS indexes and metadata
+video_cache = VideoStateCache(
+    max_entries=VIDEO_CACHE_MAX_ENTRIES,
+    max_bytes=VIDEO_CACHE_MAX_BYTES,
+    ttl_seconds=VIDEO_CACHE_TTL
+)
+transcript_inflight = {}  # For in-flight TranscriptStore creations, keyed by video_id
+
+# Answers to /process questions, per (video_id, addition_mode)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))  # Cosine similarity for two questions to share an answer
+ANSWER_CACHE_TTL = 6 * 3600  # Seconds a cached answer is served
+ANSWER_CACHE_MAX_ENTRIES = 64  # Cached questions per video and mode
+ANSWER_CACHE_MAX_BUCKETS = 256  # (video, mode) pairs with cached answers, least recently used dropped first
+answer_cache = AnswerCache(
+    similarity_threshold=ANSWER_CACHE_SIMILARITY,
+    ttl_seconds=ANSWER_CACHE_TTL,
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    max_buckets=ANSWER_CACHE_MAX_BUCKETS
+)
+
+# Web refinement gating for /process
+REFINE_MIN_SIMILARITY = float(os.getenv("REFINE_MIN_SIMILARITY", "0.55"))  # Best chunk similarity below which the draft is refined
+REFINE_MIN_ANSWER_WORDS = int(os.getenv("REFINE_MIN_ANSWER_WORDS", "12"))  # Drafts shorter than this are refined
+REFINE_LATENCY_BUDGET = float(os.getenv("REFINE_LATENCY_BUDGET", "8"))  # Seconds to wait for refinement before answering with the draft
+refine_gate = RefinementGate(min_similarity=REFINE_MIN_SIMILARITY, min_answer_words=REFINE_MIN_ANSWER_WORDS)
+
+# Persistent storage for transcripts, translations, notes and summaries
+video_store = VideoStore()
+
+# Cross-video index settings
+GLOBAL_INDEX_MODE = os.getenv("GLOBAL_INDEX_MODE", "false").lower() == "true"  # One shared FAISS index for all videos
+GLOBAL_INDEX_SAVE_INTERVAL = 60  # Minimum seconds between saves of the shared index
+SEARCH_ALL_MAX_K = 50  # Most results one /search_all request may ask for
+
+global_index = GlobalVectorIndex.load() if GLOBAL_INDEX_MODE else None
+
+# Generated audio, keyed by (video_id, language, segment, voice, source text hash)
+AUDIO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Disk quota for cached audio segments
+AUDIO_CACHE_FLUSH_INTERVAL = 30  # Seconds between manifest flushes, so cache hits' access times persist
+audio_cache = AudioSegmentCache(max_bytes=AUDIO_CACHE_MAX_BYTES)
+
+# Whole-video dub rendering
+DUB_MAX_JOBS = 1  # Dub jobs rendered at once
+DUB_TTS_WORKERS = 4  # Concurrent TTS calls per dub job
+DUB_QUEUE_SIZE = 32  # Translated segments allowed to wait for TTS
+DUB_JOB_RETENTION = 3600  # Seconds a finished dub job's progress stays available
+
+# Background dubbing around the playhead
+PREFETCH_BEHIND = 5  # Segments before the playhead kept in the prefetch window
+PREFETCH_AHEAD = 10  # Segments after the playhead kept in the prefetch window
+PREFETCH_CONCURRENCY = 2  # Maximum prefetch batches running at once across all videos
+PREFETCH_BATCH_SIZE = 8  # Contiguous segments translated and synthesised per batch
+TRANSLATION_BATCH_SIZE = 16  # Maximum contiguous segments translated by one LLM call
+
+# Text-to-speech engine ("edge" online, or "silence" for offline benchmarks and tests)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "edge")
+TTS_MAX_CONCURRENCY = 4  # Simultaneous syntheses allowed against the backend
+if TTS_BACKEND not in TTS_BACKENDS:
+    raise ValueError(f"Unknown TTS_BACKEND '{TTS_BACKEND}', expected one of {sorted(TTS_BACKENDS)}")
+tts_backend = create_tts_backend(TTS_BACKEND, VOICE_CONFIGS[TTS_BACKEND], DEFAULT_VOICES[TTS_BACKEND],
+                                 max_concurrency=TTS_MAX_CONCURRENCY)
+
+def voice_for(lang):
+    return tts_backend.voice_for(lang)
+
+# Fallback machine translation (mtranslate) for text the LLM translator could not handle
+MTRANSLATE_RATE = 5  # Requests per second
+MTRANSLATE_BURST = 5  # Requests allowed back to back before throttling
+mtranslate_limiter = TokenBucket(MTRANSLATE_RATE, MTRANSLATE_BURST)
 
 async def translate_text_async(text, target_language):
     """Translate text asynchronously using mtranslate."""
     try:
-        await asyncio.sleep(0.2)
+        await mtranslate_limiter.acquire()
         translated_text = await asyncio.to_thread(translate, text, target_language)
         return translated_text
     except Exception as e:
         print(f"Translation error: {str(e)}")
         return text
 
-async def process_transcript(transcript_original, whole_transcript, video_id, source_lang, target_lang, segment_no):
-    segment_no = int(segment_no)
-    path = f"data/{video_id}"
-    os.makedirs(path, exist_ok=True)
-
-    path = f"data/{video_id}/segment_{segment_no:04d}.mp3"
-    
-    segment_index = next((i for i, seg in enumerate(transcript_original) if seg['Segment'] == segment_no), None)
-    if segment_index is None:
-        print(f"❌ Segment {segment_no} not found.")
-        return []
-
-    start_index = max(0, segment_index - 5)
-    end_index = min(len(transcript_original), segment_index + 11)
-    print(f"start_index {start_index} end_index {end_index}")
-    data = []
-    
-    whole_words = whole_transcript.split()
-    total_words = len(whole_words)
-
-    for i in range(start_index, end_index):
-        print(i)
-        if i < 0 or i >= len(transcript_original):
+async def with_rate_limit_retry(call, max_retries=3, delay=5):
+    """Await call(), retrying with exponential backoff while the API answers 429. Returns None if retries run out."""
+    for attempt in range(max_retries):
+        try:
+            return await call()
+        except Exception as e:
+            if "429" in str(e):
+                print(f"Rate limit exceeded. Retrying in {delay} seconds (Attempt {attempt + 1}/{max_retries})...")
+                await asyncio.sleep(delay)
+                delay *= 2
+            else:
+                raise e
+    return None
+
+async def translate_single_segment(transcript_store, i, target_lang):
+    """Translate segment i on its own, with the context window around it. Returns (text, provenance)."""
+    segments = transcript_store.segments
+    segment_text = segments.text_at(i)
+    context = context_text(segments, transcript_store.english_words, i)
+    txt = await with_rate_limit_retry(
+        lambda: translate_segment(context, segment_text, transcript_store.original_video_lang, target_lang))
+    if txt is None:
+        print(f"❌ Failed to translate segment {i + 1} after retries.")
+        return segment_text, "source"
+    return txt, "llm_segment"
+
+async def translate_segment_run(transcript_store, run, target_lang):
+    """
+    Translate contiguous segment positions with one batched LLM call and shared context.
+    Falls back to per-segment calls only if the batch response is malformed; a batch that is
+    still rate limited after its retries keeps the source text rather than adding more calls.
+    Returns (text, provenance) pairs.
+    """
+    if target_lang == transcript_store.original_video_lang:
+        return [(transcript_store.segments.text_at(i), "source") for i in run]
+    if len(run) == 1:
+        return [await translate_single_segment(transcript_store, run[0], target_lang)]
+
+    segments = transcript_store.segments
+    context = span_context_text(segments, transcript_store.english_words, run[0], run[-1])
+    batch = [(i + 1, segments.text_at(i)) for i in run]
+    try:
+        translations = await with_rate_limit_retry(
+            lambda: translate_segments_batch(context, batch, transcript_store.original_video_lang, target_lang))
+        if translations is None:
+            print(f"❌ Segments {run[0] + 1}-{run[-1] + 1} still rate limited after retries, keeping source text.")
+            return [(segments.text_at(i), "source") for i in run]
+        print(f"✅ Translated segments {run[0] + 1}-{run[-1] + 1} in one call")
+        return [(txt, "llm_batch") for txt in translations]
+    except ValueError as e:
+        print(f"⚠ Malformed batch translation for segments {run[0] + 1}-{run[-1] + 1}, falling back per segment: {str(e)}")
+    return [await translate_single_segment(transcript_store, i, target_lang) for i in run]
+
+async def process_transcript(transcript_store, target_lang, segment_numbers):
+    """
+    Translate the given segments that have no cached audio in target_lang, batching contiguous runs.
+    Each returned segment records the Language its Text is in and its Provenance
+    ("llm_batch", "llm_segment", or "source" when the original text was kept).
+    """
+    video_id = transcript_store.video_id
+    source_lang = transcript_store.original_video_lang
+    segments = transcript_store.segments
+    voice = voice_for(target_lang)
+
+    # Positions of the segments that still need audio, grouped into contiguous runs
+    runs = []
+    for segment_no in sorted(set(segment_numbers)):
+        i = segments.position(segment_no)
+        if i is None:
+            print(f"❌ Segment {segment_no} not found.")
             continue
-
-        segment = transcript_original[i]
-        seg_no = segment['Segment']
-
-        segment_path = f"data/{video_id}/segment_{seg_no:04d}.mp3"
-        if os.path.exists(segment_path):
-            print(f"✅ Segment {seg_no} already exists. Skipping...")
-            continue  
-
-        print(f"🔍 Processing missing segment {seg_no}...")
-
-        segment_text = segment['Text']
-        segment_words = segment_text.split()
-        segment_word_count = len(segment_words)
-
-        segment_start_word_idx = sum(len(s['Text'].split()) for s in transcript_original[:i])
-
-        left_idx = max(0, segment_start_word_idx - 10)
-        right_idx = min(total_words, segment_start_word_idx + segment_word_count + 15)
-
-        if i == 0:
-            left_idx = 0
-            right_idx = min(50, total_words)
-        elif i == len(transcript_original) - 1:
-            left_idx = max(0, total_words - 50)
-            right_idx = total_words
-
-        context_text = " ".join(whole_words[left_idx:right_idx])
-
-        max_retries = 3
-        delay = 5  
-
-        for attempt in range(max_retries):
-            try:
-                txt = await translate_segment(context_text, segment_text, source_lang, target_lang)
-                break  
-            except Exception as e:
-                if "429" in str(e):  
-                    print(f"Rate limit exceeded. Retrying in {delay} seconds (Attempt {attempt + 1}/{max_retries})...")
-                    await asyncio.sleep(delay)
-                    delay *= 2  
-                else:
-                    raise e  
+        if audio_cache.peek(video_id, target_lang, segment_no, voice, text_hash(segments.text_at(i))) is not None:
+            print(f"✅ Segment {segment_no} already cached in {target_lang}. Skipping...")
+            continue
+        if runs and runs[-1][-1] == i - 1 and len(runs[-1]) < TRANSLATION_BATCH_SIZE:
+            runs[-1].append(i)
         else:
-            print(f"❌ Failed to translate segment {seg_no} after {max_retries} retries.")
-            txt = segment_text  
+            runs.append([i])
 
-        data.append({
-            'Segment': seg_no,
-            'Text': txt,
-            'Start': segment['Start'],
-            'End': segment['End'],
-            'Duration': segment['Duration']
-        })
+    data = []
+    for run in runs:
+        print(f"🔍 Processing missing segments {run[0] + 1}-{run[-1] + 1}...")
+        translations = await translate_segment_run(transcript_store, run, target_lang)
+        for i, (txt, provenance) in zip(run, translations):
+            segment = segments.row(i)
+            data.append({
+                'Segment': segment['Segment'],
+                'Text': txt,
+                'Start': segment['Start'],
+                'End': segment['End'],
+                'Duration': segment['Duration'],
+                'TextHash': text_hash(segment['Text']),
+                'Language': source_lang if provenance == "source" else target_lang,
+                'Provenance': provenance
+            })
 
-    return data 
+    return data
 
 async def get_transcript_with_timestamps_async(video_id):
     ytt_api = YouTubeTranscriptApi()
@@ -241,365 +345,357 @@ async def get_transcript_with_timestamps_async(video_id):
             print("No transcript available")
             return None, None, None
         transcript_list = transcript_list.to_raw_data()
-        data = []
-        string_transcript = ""
-
-        for i, entry in enumerate(transcript_list):
-            segment_number = i + 1
-            start_time = entry['start']
-            duration = entry.get('duration', 0)
-            calculated_end_time = start_time + duration
-
-            if i < len(transcript_list) - 1:
-                next_start_time = transcript_list[i + 1]['start']
-                end_time = next_start_time if calculated_end_time > next_start_time else calculated_end_time
-                adjusted_duration = end_time - start_time
-            else:
-                end_time = calculated_end_time
-                adjusted_duration = duration
-
-            data.append({
-                "Segment": segment_number,
-                "Text": entry['text'],
-                "Start": format_timestamp(start_time),
-                "End": format_timestamp(end_time),
-                "Duration": format_timestamp(adjusted_duration)
-            })
-            string_transcript += entry['text']
+        segments = SegmentTable.from_raw(transcript_list)
 
-        return data, source_language, string_transcript
+        # The segment text buffer is the segments concatenated, i.e. the whole original transcript
+        return segments, source_language, segments.text
     except Exception as e:
         print(f"Error retrieving transcript: {str(e)}")
         return None, None, None
 
 async def generate_audio_and_save(text, lang, output_path):
-    """Generate audio using edge-tts."""
+    """Generate audio using the configured TTS backend."""
     try:
-        voice = VOICE_CONFIGS.get(lang, "en-AU-WilliamNeural")
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(output_path)
+        await tts_backend.save(text, voice_for(lang), output_path)
         return True
     except Exception as e:
         print(f"Error generating audio: {str(e)}")
         return False
     
+async def text_for_speech(segment, target_language):
+    """Segment text in target_language, machine-translating only text still in another language."""
+    if segment['Language'] != target_language:
+        return await translate_text_async(segment['Text'], target_language)
+    return segment['Text']
+
+# Segments being synthesised, keyed like the audio cache, so dub jobs, prefetch batches and
+# streams never write the same segment twice; later callers wait for the first one instead
+synthesis_inflight = {}
+
+def begin_synthesis(key):
+    """Register key as being synthesised; the returned future is resolved by end_synthesis()."""
+    future = asyncio.get_running_loop().create_future()
+    synthesis_inflight[key] = future
+    return future
+
+def end_synthesis(key, future):
+    if synthesis_inflight.get(key) is future:
+        del synthesis_inflight[key]
+    future.set_result(None)
+
+async def synthesize_segment(segment, video_id, target_language):
+    """Synthesise one translated segment and record it in the audio cache."""
+    segment_num = segment['Segment']
+    if not segment['Text'].strip():
+        return
+    voice = voice_for(target_language)
+    key = (video_id, target_language, segment_num, voice, segment['TextHash'])
+    inflight = synthesis_inflight.get(key)
+    if inflight is not None:
+        await asyncio.shield(inflight)
+        return
+    if audio_cache.peek(*key) is not None:  # Finished by another writer since it was queued
+        return
+
+    future = begin_synthesis(key)
+    try:
+        segment_text = await text_for_speech(segment, target_language)
+        audio_file = audio_cache.path_for(*key)
+        os.makedirs(os.path.dirname(audio_file), exist_ok=True)
+        if await generate_audio_and_save(segment_text, target_language, audio_file):
+            audio_cache.add(*key, audio_file)
+            print(f"Processed segment {segment_num}")
+    except Exception as e:
+        print(f"Error processing segment {segment_num}: {str(e)}")
+    finally:
+        end_synthesis(key, future)
+
 async def create_audio_segments(transcript_data, video_id, target_language):
-    """Generates and saves audio segments."""
-    audio_path = os.path.join('data', video_id)
-    os.makedirs(audio_path, exist_ok=True)
-    
-    tasks = []
-    for segment in transcript_data:
-        if not segment['Text'].strip():
-            continue
-            
-        async def process_segment(segment_text, segment_num):
-            try:
-                translated_text = await translate_text_async(segment_text, target_language)
-                audio_file = os.path.join(audio_path, f"segment_{segment_num:04d}.mp3")
-                await generate_audio_and_save(translated_text, target_language, audio_file)
-                print(f"Processed segment {segment_num}")
-            except Exception as e:
-                print(f"Error processing segment {segment_num}: {str(e)}")
-        
-        tasks.append(process_segment(segment['Text'], segment['Segment']))
-    
-    await asyncio.gather(*tasks)
-    print(f"Audio segments saved in: {audio_path}")
+    """
+    Generates audio segments and records them in the audio cache.
+    Only segments whose Language differs from target_language are machine-translated first.
+    """
+    await asyncio.gather(*(synthesize_segment(segment, video_id, target_language) for segment in transcript_data))
+    await asyncio.to_thread(audio_cache.flush)
+    print(f"Audio segments cached for {video_id} ({target_language})")
+
+async def stream_audio_segment(segment, video_id, target_language):
+    """
+    Yield MP3 bytes from the TTS backend as they are synthesised, tee'ing them into the audio cache.
+    The file only enters the cache once the whole segment was written.
+    """
+    segment_num = segment['Segment']
+    voice = voice_for(target_language)
+    key = (video_id, target_language, segment_num, voice, segment['TextHash'])
+    audio_file = audio_cache.path_for(*key)
+    partial_file = f"{audio_file}.{uuid.uuid4().hex}.part"  # Unique, so no other writer shares it
+    os.makedirs(os.path.dirname(audio_file), exist_ok=True)
+
+    inflight = synthesis_inflight.get(key)
+    if inflight is not None:
+        # Another writer got there first; send its result once it is done
+        await asyncio.shield(inflight)
+        cached_file = audio_cache.peek(*key)
+        if cached_file is not None:
+            yield await asyncio.to_thread(read_file, cached_file)
+        return
+
+    future = begin_synthesis(key)
+    completed = False
+    try:
+        segment_text = await text_for_speech(segment, target_language)
+        with open(partial_file, "wb") as f:
+            async for data in tts_backend.stream(segment_text, voice):
+                f.write(data)
+                yield data
+        os.replace(partial_file, audio_file)
+        audio_cache.add(video_id, target_language, segment_num, voice, segment['TextHash'], audio_file)
+        await asyncio.to_thread(audio_cache.flush)
+        completed = True
+        print(f"✅ Streamed and cached segment {segment_num}")
+    except Exception as e:
+        print(f"❌ Error streaming segment {segment_num}: {str(e)}")
+    finally:
+        # A failed or disconnected stream must not leave a truncated file behind
+        if not completed and os.path.exists(partial_file):
+            os.remove(partial_file)
+        end_synthesis(key, future)
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
 
 class TranscriptStore:
-    def __init__(self, video_id, transcript_original, source_lang, original_string_transcript, whole_string_transcript_english):
+    def __init__(self, video_id, segments, source_lang, whole_string_transcript_english):
         self.video_id = video_id
 
-        if transcript_original is None:
+        if segments is None:
             self.is_transcript_exists = False
         else:
-            self.transcript_original = transcript_original
+            self.segments = segments
             self.original_video_lang = source_lang
             self.is_transcript_exists = True
             self.audio_generated = False
             self.audio_generated_language = None
             self.is_summary_generated = False
             self.summary = ""
-            self.whole_string_transcript_original = original_string_transcript
             self.whole_string_transcript_english = whole_string_transcript_english
             self.is_summary_generated = False
             self.is_notes_generated = False
             self.summary = False
             self.notes = False
+            self.english_words = WordIndex(whole_string_transcript_english)
+
+    @property
+    def transcript_original(self):
+        """Segments as the list of dicts served by the API, built on demand from the segment table."""
+        return self.segments.to_dicts()
+
+    @property
+    def whole_string_transcript_original(self):
+        return self.segments.text
+
+    def segment_at(self, seconds):
+        """Index of the segment whose start is closest to the playback time, in O(log n)."""
+        return self.segments.segment_at(seconds)
 
     @classmethod
     async def create(cls, video_id):
-        transcript_original, source_lang, original_string_transcript = await get_transcript_with_timestamps_async(video_id)
+        record = await asyncio.to_thread(video_store.get, video_id, "transcript")
+        if record is not None:
+            print(f"💾 Loaded transcript for {video_id} from persistent store")
+            store = cls(video_id, SegmentTable.from_record(record["segments"]), record["source_lang"], record["english"])
+            await store.load_generated()
+            return store
+
+        segments, source_lang, original_string_transcript = await get_transcript_with_timestamps_async(video_id)
         whole_string_transcript_english = original_string_transcript
         if source_lang != 'en':
             whole_string_transcript_english = await count_words_and_translate(original_string_transcript)
-        return cls(video_id, transcript_original, source_lang, original_string_transcript, whole_string_transcript_english)
-
-def summarize_chunk(chunk, mode="summary"):
-    """
-    Summarize a single chunk of text using Mistral.
-    Supports both 'notes' and 'summary' generation modes.
-    
-    Args:
-        chunk: Text content to process
-        mode: Either "notes" (for detailed notes) or "summary" (for concise summary)
-        
-    Returns:
-        Processed content based on the selected mode
-    """
-    retries = 0
-    while retries < MAX_RETRIES:
-        try:
-            if mode == "notes":
-                messages = [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a professional note-taking assistant. Generate detailed, "
-                            "well-structured notes from the following content. Include:\n"
-                            "1. Key concepts and main ideas\n"
-                            "2. Important technical terms\n"
-                            "3. Logical structure with bullet points\n"
-                            "4. Relevant examples (when helpful)\n"
-                            "Format with clear headings and bullet points."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Generate comprehensive notes from this content:\n\n{chunk}"
-                    }
-                ]
-            else:  # summary mode
-                messages = [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert summary generation assistant. Create a concise, "
-                            "coherent summary that captures the essential information."
-                            "Focus on:"
-                            " Key points and main ideas,Logical flow between conceptsPreservation of important termsOmitting redundant examplesStructure as a single cohesive paragraph"
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Generate a concise summary of this content:\n\n{chunk}"
-                    }
-                ]
-            
-            response = client.chat.complete(
-                model=model,
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.3 if mode == "summary" else 0.5  # More creative for notes
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            if "rate limit" in str(e).lower():
-                retries += 1
-                print(f"Rate limit exceeded. Retrying ({retries}/{MAX_RETRIES})...")
-                time.sleep(RATE_LIMIT_DELAY * retries)
-            else:
-                return f"Error generating {mode} for chunk: {str(e)}"
-    return f"Error: Failed to process chunk after {MAX_RETRIES} retries"
-
-
-def get_notes_from_summary(transcript):
-    notes = ''
-    chunk_size = 8000
-    chunks = [transcript[i:i + chunk_size] for i in range(0, len(transcript), chunk_size)]
-    
-    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
-        futures = [executor.submit(summarize_chunk, chunk, "notes") for chunk in chunks]
-        
-        for future in as_completed(futures):
-            try:
-                notes += future.result() + "\n\n----------------------------------------\n\n"
-            except Exception as e:
-                notes += f"Error generating notes: {str(e)}\n\n"
-    
-    return notes.replace("*", "").replace("#", "")
-
-def generate_summary_directly(transcript, max_concurrent_requests=4):
-    if not transcript:
-        return "No transcript available for summary generation"
-    
-    chunk_size = 8000
-    chunks = [transcript[i:i + chunk_size] for i in range(0, len(transcript), chunk_size)]
-    
-    with ThreadPoolExecutor(max_workers=max_concurrent_requests) as executor:
-        futures = [executor.submit(summarize_chunk, chunk, "summary") for chunk in chunks]
-        
-        chunk_summaries = []
-        for future in as_completed(futures):
-            try:
-                chunk_summaries.append(future.result())
-            except Exception as e:
-                chunk_summaries.append(f"Error in summarization: {str(e)}")
-    
-    combined = "\n".join([s for s in chunk_summaries if not s.startswith("Error")])
-    return summarize_chunk(combined, "summary") if len(chunk_summaries) > 1 else combined
-
-def chunk_transcript(transcript_data, max_words=50):
-    """Splits the transcript into chunks of approximately max_words words while preserving timestamps."""
-    transcript_list = transcript_data.get("transcript", [])
-    print(transcript_data)
-
-    if not transcript_list or not isinstance(transcript_list, list):
-        print("Error: Transcript data is empty or not in the expected format.")
-        return []
-
-    chunks = []
-    current_chunk = []
-    current_word_count = 0
-    chunk_start_time = None
-
-    for segment in transcript_list:
-        if not isinstance(segment, dict) or "Text" not in segment:
-            print(f"Skipping invalid segment: {segment}")
-            continue
-
-        words = segment["Text"].split()
-        word_count = len(words)
 
-        if chunk_start_time is None:
-            chunk_start_time = segment["Start"]
-
-        if current_word_count + word_count > max_words:
-            chunk_text = " ".join(current_chunk)
-            chunk_end_time = transcript_list[transcript_list.index(segment) - 1]["End"]
-            
-            chunks.append({
-                "Text": chunk_text,
-                "Start": chunk_start_time,
-                "End": chunk_end_time
+        store = cls(video_id, segments, source_lang, whole_string_transcript_english)
+        if store.is_transcript_exists:
+            await asyncio.to_thread(video_store.put, video_id, "transcript", {
+                "segments": segments.to_record(),
+                "source_lang": source_lang,
+                "english": whole_string_transcript_english
             })
+        return store
+
+    async def load_generated(self):
+        """Restore previously generated notes and summary from the persistent store."""
+        notes = await asyncio.to_thread(video_store.get, self.video_id, "notes")
+        if notes is not None:
+            self.notes = notes
+            self.is_notes_generated = True
+        summary = await asyncio.to_thread(video_store.get, self.video_id, "summary")
+        if summary is not None:
+            self.summary = summary
+            self.is_summary_generated = True
+
+    async def save_notes(self, notes):
+        self.notes = notes
+        self.is_notes_generated = True
+        await asyncio.to_thread(video_store.put, self.video_id, "notes", notes)
+
+    async def save_summary(self, summary):
+        self.summary = summary
+        self.is_summary_generated = True
+        await asyncio.to_thread(video_store.put, self.video_id, "summary", summary)
+
+async def _create_transcript_store(video_id):
+    """Create the TranscriptStore for video_id and register it once finished."""
+    try:
+        transcript_store = await TranscriptStore.create(video_id)
+        video_cache.set(video_id, transcript_store=transcript_store)
+        return transcript_store
+    finally:
+        transcript_inflight.pop(video_id, None)
 
-            current_chunk = []
-            current_word_count = 0
-            chunk_start_time = segment["Start"]
-
-        current_chunk.extend(words)
-        current_word_count += word_count
-
-    if current_chunk:
-        chunk_text = " ".join(current_chunk)
-        chunk_end_time = transcript_list[-1]["End"]
-        chunks.append({
-            "Text": chunk_text,
-            "Start": chunk_start_time,
-            "End": chunk_end_time
-        })
+async def get_or_create_transcript_store(video_id):
+    """
+    Return the TranscriptStore for video_id, creating it if needed.
+    Concurrent callers for the same video await one shared creation task
+    instead of each fetching and translating the transcript themselves.
+    """
+    state = video_cache.get(video_id)
+    if state is not None and state.transcript_store is not None:
+        return state.transcript_store
+
+    task = transcript_inflight.get(video_id)
+    if task is None:
+        print(f"🚀 Creating transcript store for {video_id}...")
+        task = asyncio.ensure_future(_create_transcript_store(video_id))
+        transcript_inflight[video_id] = task
+    else:
+        print(f"⏳ Transcript store for {video_id} already being created. Waiting...")
 
-    return chunks
+    # Shield so a cancelled request does not cancel the creation other callers wait on
+    return await asyncio.shield(task)
 
 def store_embeddings(chunks):
     """Create FAISS index from document chunks"""
-    print(chunks)
     texts = [chunk["Text"] for chunk in chunks]
-    vector_store = FAISS.from_texts(texts, embedding_model)
+    metadatas = [
+        {"chunk": i, "start": chunk.get("StartSeconds"), "end": chunk.get("EndSeconds")}
+        for i, chunk in enumerate(chunks)
+    ]
+    vector_store = FAISS.from_texts(texts, embedding_model, metadatas=metadatas)
     return vector_store
 
-def check_query_relevance(vector_store, query):
-    """Check if query is relevant to the transcript context"""
-    docs_and_scores = vector_store.similarity_search_with_score(query, k=1)
-    if not docs_and_scores:
-        return False
-    best_match, best_score = docs_and_scores[0]
-    similarity_score = 1 - best_score
-    return similarity_score >= SIMILARITY_THRESHOLD
-
-def get_conversational_chain():
-    prompt_template = """
-    You are an AI assistant helping users find relevant information from a video transcript.
-    Context: {context}
-    Question: {question}
-    Answer:
+def retrieve_chunks(vector_store, query_vector, k=RETRIEVAL_TOP_K):
     """
-    prompt = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
-    chain = load_qa_chain(llm_genai, chain_type="stuff", prompt=prompt)
-    return chain
-
-def search_query_with_llm(vector_store, chunks, query):
-    """ Search for relevant chunks and use LLM to generate an answer """
-    docs_and_scores = vector_store.similarity_search_with_score(query, k=3)
-    best_match, best_score = docs_and_scores[0]
-    similarity_score = 1 - best_score
-
-    if similarity_score < SIMILARITY_THRESHOLD:
+    Run one FAISS search for the query and return the top-k (document, similarity) hits
+    that clear SIMILARITY_THRESHOLD. An empty list means the query is out of context.
+    """
+    docs_and_scores = vector_store.similarity_search_with_score_by_vector(query_vector, k=k)
+    hits = []
+    for doc, score in docs_and_scores:
+        similarity_score = 1 - score
+        if similarity_score >= SIMILARITY_THRESHOLD:
+            hits.append((doc, similarity_score))
+    return hits
+
+def retrieve_global_chunks(query_vector, video_ids, k=RETRIEVAL_TOP_K):
+    """ Same as retrieve_chunks, but searches the shared cross-video index restricted to video_ids """
+    hits = []
+    for hit in global_index.search(query_vector, k, video_ids):
+        if hit["similarity"] >= SIMILARITY_THRESHOLD:
+            hits.append((Document(page_content=hit["text"], metadata=hit), hit["similarity"]))
+    return hits
+
+def search_query_with_llm(hits, query):
+    """ Use LLM to generate an answer from the retrieved top-k chunks """
+    if not hits:
         return None
 
-    best_chunks = [Document(page_content=best_match.page_content)]
-    qa_chain = get_conversational_chain()
+    best_chunks = [Document(page_content=doc.page_content) for doc, _ in hits]
+    qa_chain = components.get("qa_chain")
     answer = qa_chain.run(input_documents=best_chunks, question=query)
     return answer
 
-def get_yt_details(video_id):
+async def stream_query_with_llm(hits, query):
+    """ Same prompt as search_query_with_llm, but yields the answer text as llm_genai generates it """
+    # The "stuff" chain joins documents with blank lines; do the same so both paths see one prompt
+    context = "\n\n".join(doc.page_content for doc, _ in hits)
+    async for chunk in llm_genai.astream(QA_PROMPT.format(context=context, question=query)):
+        if chunk.content:
+            yield chunk.content
+
+async def get_yt_details(video_id):
     """Fetches YouTube video title and channel."""
-    try:
-        ydl_opts = {}
-        yt_url = f'https://www.youtube.com/watch?v={video_id}'
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(yt_url, download=False)
-            return info.get('uploader', 'Unknown Channel'), info.get('title', 'Unknown Title')
-    except Exception as e:
-        print(f"Error getting YouTube details: {str(e)}")
-        return "Unknown Channel", "Unknown Title"
+    metadata = await metadata_service.get(video_id)
+    return metadata["channel"], metadata["title"]
 
 def refine_answer_with_serper(query, context_answer, yt_channel, yt_title):
-    """Refine answer with additional web search info if needed"""
-    try:
-        refinement_agent = Agent(
-            role="Answer Refinement Agent",
-            goal=(
-                "Enhance the generated response using the latest web data. If the query pertains to a YouTube channel, provide information specifically related to {yt_channel}. "
-                "If the query is based on the video title, ensure the response focuses on {yt_title} as referenced in the transcript."
-            ),
-            backstory="This agent verifies and refines responses using real-time search when needed. If no valid source is found, it relies solely on embeddings.",
-            verbose=True,
-            memory=True,
-            tools=[serper_tool],
-            llm=llm,
-            allow_delegation=False
-        )
-
-        refinement_task = Task(
-            description=(
-                "Improve the response by incorporating the latest web data for the query: {query} and the given context answer: {context_answer}. "
-                "Since the query is related to the YouTube channel {yt_channel} and video title {yt_title}, ensure that the response remains aligned with this context. "
-                "If no valid information is found online, generate the response only from embeddings and do not mention that the internet did not provide relevant details."
-                "Give the straight forward answer and dont provide unnecessary information"
-            ),
-            expected_output="A well-verified and refined response with accurate information. If no valid online sources are found, the response should explicitly state that the answer is based solely on embeddings.",
-            tools=[serper_tool],
-            agent=refinement_agent,
-        )
-
-        crew = Crew(agents=[refinement_agent], tasks=[refinement_task], verbose=True, process=Process.sequential)
+    """Refine answer with additional web search info if needed. Errors propagate so the gate can record them."""
+    with components.lease("refinement_crew") as crew:
         result = crew.kickoff(inputs={'query': query, 'context_answer': context_answer, 'yt_channel': yt_channel, 'yt_title': yt_title})
-        return result.raw
-    except Exception as e:
-        print(f"Error refining answer: {str(e)}")
-        return context_answer
+    return result.raw
+
+# Heavy objects built once and reused across requests. A crew run or a yt-dlp
+# extraction keeps state on its object, so those are pooled rather than shared.
+REFINEMENT_CREW_POOL_SIZE = 2  # Concurrent answer refinements
+YT_DLP_POOL_SIZE = 2  # Concurrent metadata lookups
+components = ComponentRegistry()
+components.register("qa_chain", get_conversational_chain)
+components.register("refinement_crew", build_refinement_crew, pool_size=REFINEMENT_CREW_POOL_SIZE)
+# Refinements run on their own threads, one per crew, so a slow crew never occupies the default
+# executor that embeddings, FAISS searches and SQLite go through
+refine_executor = ThreadPoolExecutor(max_workers=REFINEMENT_CREW_POOL_SIZE, thread_name_prefix="refine")
+refine_slots = asyncio.Semaphore(REFINEMENT_CREW_POOL_SIZE)
+components.register("yt_dlp", build_yt_dlp, pool_size=YT_DLP_POOL_SIZE)
+
+# Video channel/title lookups: oEmbed first, yt-dlp as the fallback ("stub" for offline runs)
+METADATA_PROVIDERS = os.getenv("METADATA_PROVIDERS", "oembed,yt_dlp").split(",")
+METADATA_TIMEOUT = 5  # Seconds per oEmbed request
+METADATA_TTL = 7 * 24 * 3600  # Seconds a stored channel/title is trusted
+
+def build_metadata_provider(name):
+    if name == "oembed":
+        return create_metadata_provider(name, timeout=METADATA_TIMEOUT)
+    if name == "yt_dlp":
+        return create_metadata_provider(name, lease=lambda: components.lease("yt_dlp"))
+    return create_metadata_provider(name)
+
+metadata_service = MetadataService([build_metadata_provider(name.strip()) for name in METADATA_PROVIDERS],
+                                   video_store, ttl_seconds=METADATA_TTL)
 
 def is_processed(video_id):
     """ Check if a FAISS index exists in memory for the given video_id. """
-    return video_id in index_cache
-
-def store_metadata(video_id, transcript, yt_channel, yt_title, chunks):
-    """ Stores transcript, channel, and title in metadata cache """
-    metadata_cache[video_id] = {
-        "transcript": transcript,
+    state = video_cache.peek(video_id)
+    if GLOBAL_INDEX_MODE:
+        return state is not None and state.metadata is not None and video_id in global_index
+    return state is not None and state.vector_store is not None
+
+def add_to_global_index(video_id, chunks):
+    """ Adds a video's chunk embeddings to the shared cross-video index """
+    # Served from the embedding cache when the per-video store was just built from the same texts
+    vectors = embedding_model.embed_documents([chunk["Text"] for chunk in chunks])
+    global_index.add_video(video_id, vectors, [
+        {
+            "Text": chunk["Text"],
+            "start": chunk["StartSeconds"],
+            "end": chunk["EndSeconds"]
+        }
+        for chunk in chunks
+    ])
+    global_index.maybe_save(GLOBAL_INDEX_SAVE_INTERVAL)
+
+def store_metadata(video_id, yt_channel, yt_title, chunks):
+    """ Stores channel, title and chunks in the video cache; the transcript stays in its TranscriptStore """
+    video_cache.set(video_id, metadata={
         "yt_channel": yt_channel,
         "yt_title": yt_title,
-        "chunks": chunks
-    }
+        "chunks": chunks,
+        "chunk_starts": [chunk.get("StartSeconds", 0.0) for chunk in chunks]
+    })
 
 def store_faiss_index(video_id, vector_store):
     """ Stores FAISS index in memory cache """
     try:
         print(f"🔹 Saving FAISS index in memory for video: {video_id}")
-        index_cache[video_id] = vector_store
+        video_cache.set(video_id, vector_store=vector_store)
         print(f"✅ FAISS index stored successfully in memory")
         return True
     except Exception as e:
@@ -610,34 +706,75 @@ def load_faiss_index(video_id):
     """ Loads the FAISS index from memory """
     print(f"🔹 Checking for FAISS index in memory for video: {video_id}")
 
-    if video_id not in index_cache:
+    state = video_cache.get(video_id)
+    if state is None or state.vector_store is None:
         raise KeyError(f"🚨 FAISS index not found in memory for video: {video_id}")
 
-    try:
-        return index_cache[video_id]
-    except Exception as e:
-        raise RuntimeError(f"Failed to load FAISS index from memory: {str(e)}")
+    return state.vector_store
+
+async def load_precomputed(video_id):
+    """ Loads a FAISS index and metadata persisted by an earlier precompute into memory """
+    qa_metadata = await asyncio.to_thread(video_store.get, video_id, "qa_metadata")
+    if qa_metadata is None:
+        return False
+
+    if GLOBAL_INDEX_MODE:
+        vector_store = None
+        if video_id not in global_index:
+            await asyncio.to_thread(add_to_global_index, video_id, qa_metadata["chunks"])
+    else:
+        vector_store = await asyncio.to_thread(load_vector_store, video_id, embedding_model, EMBEDDING_MODEL_NAME)
+        if vector_store is None:
+            return False
+
+    transcript_store = await get_or_create_transcript_store(video_id)
+    if not transcript_store.is_transcript_exists:
+        return False
+
+    print(f"💾 Loaded precomputed data from disk for video: {video_id}")
+    store_metadata(video_id, qa_metadata["yt_channel"], qa_metadata["yt_title"], qa_metadata["chunks"])
+    return vector_store is None or store_faiss_index(video_id, vector_store)
 
 async def precompute(video_id):
-    """ Precompute transcript and embeddings if not already stored in memory """
+    """ Precompute transcript and embeddings if not already stored in memory or on disk """
     if is_processed(video_id):
         return {"status": "cached"}
 
     try:
-        transcript = await show_transcript(video_id)
-        if "error" in transcript:
-            return {"error": transcript["error"]}
+        if await load_precomputed(video_id):
+            return {"status": "cached"}
+
+        # The channel/title lookup overlaps the transcript fetch and embedding
+        metadata_task = asyncio.create_task(get_yt_details(video_id))
 
-        chunks = chunk_transcript(transcript)
-        vector_store = store_embeddings(chunks)
+        transcript_store = await get_or_create_transcript_store(video_id)
+        if not transcript_store.is_transcript_exists:
+            return {"error": "No transcript available for this VIDEO"}
 
-        yt_channel, yt_title = get_yt_details(video_id)
+        segment_times = list(zip(transcript_store.segments.starts, transcript_store.segments.ends))
+        chunks = chunk_transcript({"transcript": transcript_store.transcript_original}, segment_times=segment_times)
+        vector_store = await asyncio.to_thread(store_embeddings, chunks)
 
-        store_metadata(video_id, transcript, yt_channel, yt_title, chunks)
+        yt_channel, yt_title = await metadata_task
 
-        if not store_faiss_index(video_id, vector_store):
+        store_metadata(video_id, yt_channel, yt_title, chunks)
+        answer_cache.invalidate(video_id)  # Answers drawn from the previous chunks and index are stale
+
+        if GLOBAL_INDEX_MODE:
+            await asyncio.to_thread(add_to_global_index, video_id, chunks)
+        elif not store_faiss_index(video_id, vector_store):
             return {"error": "Failed to store FAISS index in memory"}
 
+        try:
+            await asyncio.to_thread(save_vector_store, video_id, vector_store, EMBEDDING_MODEL_NAME)
+            await asyncio.to_thread(video_store.put, video_id, "qa_metadata", {
+                "yt_channel": yt_channel,
+                "yt_title": yt_title,
+                "chunks": chunks
+            })
+        except Exception as e:
+            print(f"⚠ Failed to persist FAISS index for {video_id}: {str(e)}")
+
         return {"status": "success", "video_id": video_id}
     except Exception as e:
         return {"error": f"Precompute failed: {str(e)}"}
@@ -645,6 +782,30 @@ async def precompute(video_id):
 app = Quart(__name__)
 app = cors(app)
 
+async def flush_audio_cache_periodically():
+    """ Persists LRU access times recorded by cache hits, which no synthesis would otherwise flush """
+    while True:
+        await asyncio.sleep(AUDIO_CACHE_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(audio_cache.flush)
+        except Exception as e:
+            print(f"⚠ Failed to flush audio cache manifests: {str(e)}")
+
+@app.before_serving
+async def start_background_tasks():
+    app.audio_flush_task = asyncio.create_task(flush_audio_cache_periodically())
+
+@app.after_serving
+async def close_clients():
+    app.audio_flush_task.cancel()
+    await asyncio.to_thread(audio_cache.flush)
+    if GLOBAL_INDEX_MODE:
+        await asyncio.to_thread(global_index.maybe_save, 0)  # Additions since the last interval save
+    await tts_backend.close()
+    await metadata_service.close()
+    refine_executor.shutdown(wait=False, cancel_futures=True)
+    components.close()
+
 @app.route('/')
 async def home():
     return "Welcome to Quart!"
@@ -653,40 +814,55 @@ async def home():
 async def get_audio(video_id, target_language, segment_number):
     try:
         segment_number = int(segment_number)
-        segment_path = f"data/{video_id}/segment_{segment_number:04d}.mp3"
-
-        transcript_key = f"{video_id}_transcript"
-        
-        if transcript_key in globals() and globals()[transcript_key].is_transcript_exists:
-            print(f"✅ Transcript found for {video_id}.")
-
-            if os.path.exists(segment_path):
-                print(f"✅ Segment {segment_number} exists: {segment_path}. Sending file...")
-                asyncio.create_task(process_and_generate_audio(video_id, target_language, segment_number))
-                return await send_file(segment_path, mimetype="audio/mpeg")
+        # ?stream=1 starts playback from the first synthesised chunk instead of the finished file
+        stream = request.args.get("stream", "false").lower() in ("1", "true")
 
-            print(f"🔍 Segment {segment_number} not found. Processing synchronously...")
+        transcript_data = await get_or_create_transcript_store(video_id)
 
-            transcript_data = globals()[transcript_key]
-            temp_trans = await process_transcript(
-                transcript_data.transcript_original,
-                transcript_data.whole_string_transcript_english,
-                video_id, transcript_data.original_video_lang, target_language, str(segment_number)
-            )
+        if transcript_data.is_transcript_exists:
+            print(f"✅ Transcript found for {video_id}.")
 
-            await create_audio_segments(temp_trans, video_id, target_language)
+            segment_index = transcript_data.segments.position(segment_number)
+            if segment_index is None:
+                return jsonify({"error": f"Segment {segment_number} not found"}), 404
+            cache_key = (video_id, target_language, segment_number, voice_for(target_language),
+                         text_hash(transcript_data.segments.text_at(segment_index)))
+
+            for attempt in range(2):
+                segment_path = audio_cache.get(*cache_key)
+                if segment_path is None and cache_key in synthesis_inflight:
+                    # A dub job, prefetch batch or other stream is already writing this segment
+                    await asyncio.shield(synthesis_inflight[cache_key])
+                    segment_path = audio_cache.peek(*cache_key)
+                if segment_path is None and stream and dub_prefetcher.claim(video_id, target_language, segment_number) is None:
+                    print(f"🔍 Segment {segment_number} not cached in {target_language}. Streaming...")
+                    temp_trans = await process_transcript(transcript_data, target_language, [segment_number])
+                    schedule_prefetch(transcript_data, target_language, segment_number)
+                    if temp_trans:
+                        return Response(stream_audio_segment(temp_trans[0], video_id, target_language), mimetype="audio/mpeg")
+                    segment_path = audio_cache.peek(*cache_key)  # Produced by another request meanwhile
+                if segment_path is None:
+                    print(f"🔍 Segment {segment_number} not cached in {target_language}. Processing synchronously...")
+                    await dub_prefetcher.run_now(video_id, target_language, segment_number)
+                    segment_path = audio_cache.peek(*cache_key)
+
+                schedule_prefetch(transcript_data, target_language, segment_number)
+
+                if segment_path is None:
+                    print("❌ Segment creation failed!")
+                    return jsonify({"error": "Segment could not be generated"}), 500
+                try:
+                    print(f"✅ Sending segment {segment_number}: {segment_path}")
+                    return await send_file(segment_path, mimetype="audio/mpeg")
+                except FileNotFoundError:
+                    print(f"⚠ Cached segment file missing, regenerating: {segment_path}")
+                    audio_cache.discard(*cache_key)
 
-            if os.path.exists(segment_path):
-                print(f"✅ Segment created successfully: {segment_path}")
-                return await send_file(segment_path, mimetype="audio/mpeg")
-            else:
-                print("❌ Segment creation failed!")
-                return jsonify({"error": "Segment could not be generated"}), 500
+            return jsonify({"error": "Segment could not be generated"}), 500
 
         else:
-            print(f"🚀 Transcript not found for {video_id}. Creating new transcript...")
-            globals()[transcript_key] = await TranscriptStore.create(video_id)
-            return await get_audio(video_id, target_language, segment_number)
+            print(f"❌ No transcript available for {video_id}.")
+            return jsonify({"error": "No transcript available for this video"}), 404
 
     except Exception as e:
         print(f"❌ Error in get_audio: {e}")
@@ -695,92 +871,93 @@ async def get_audio(video_id, target_language, segment_number):
 @app.route('/show_transcript/<video_id>')
 async def show_transcript(video_id):
    try:
-        if f"{video_id}_transcript" in globals():
-            if globals()[f"{video_id}_transcript"].is_transcript_exists:
-                return {"transcript": globals()[f"{video_id}_transcript"].transcript_original}
-            else:
-                return {"error": "No transcript available for this VIDEO"}
-        else: 
-            globals()[f"{video_id}_transcript"] = await TranscriptStore.create(video_id)
-            return await show_transcript(video_id)
+        transcript_store = await get_or_create_transcript_store(video_id)
+        if transcript_store.is_transcript_exists:
+            return {"transcript": transcript_store.transcript_original}
+        else:
+            return {"error": "No transcript available for this VIDEO"}
    except Exception as e:
         return {"error": f"An error occurred: show_transcript"}
     
 @app.route('/show_data/<video_id>')
 async def show_data(video_id):
     try:
-        if f"{video_id}_transcript" in globals():
-            transcript_store = globals()[f"{video_id}_transcript"]
-            if transcript_store.is_transcript_exists:
-                return {
-                    "video_id": transcript_store.video_id,
-                    "transcript_exists": transcript_store.is_transcript_exists,
-                    "original_language": transcript_store.original_video_lang,
-                    "audio_generated": transcript_store.audio_generated,
-                    "audio_generated_language": transcript_store.audio_generated_language,
-                    "transcript_data": transcript_store.transcript_original,
-                    "Summary_generates": transcript_store.is_summary_generated,
-                    "total_segments": len(transcript_store.transcript_original) if transcript_store.transcript_original else 0
-                }
-            else:
-                return {"error": "No transcript available for this video"}
+        transcript_store = await get_or_create_transcript_store(video_id)
+        if transcript_store.is_transcript_exists:
+            return {
+                "video_id": transcript_store.video_id,
+                "transcript_exists": transcript_store.is_transcript_exists,
+                "original_language": transcript_store.original_video_lang,
+                "audio_generated": transcript_store.audio_generated,
+                "audio_generated_language": transcript_store.audio_generated_language,
+                "transcript_data": transcript_store.transcript_original,
+                "Summary_generates": transcript_store.is_summary_generated,
+                "total_segments": len(transcript_store.segments)
+            }
         else:
-            globals()[f"{video_id}_transcript"] = await TranscriptStore.create(video_id)
-            return await show_data(video_id)
+            return {"error": "No transcript available for this video"}
     except Exception as e:
         return {"error": f"An error occurred: {str(e)}"}
 
-@app.route('/concise_summary/<video_id>', methods=['GET'])
-async def concise_summary_api(video_id):
+# --- Notes / Summary Jobs ---
+async def run_notes_job(transcript_store, job):
+    notes = await summarizer.notes(transcript_store.whole_string_transcript_english, job)
+    await transcript_store.save_notes(notes)
+    video_cache.update_size(transcript_store.video_id)
+    return notes
+
+async def run_summary_job(transcript_store, job):
+    # The summary is built from the notes; share the notes job if one is running
+    notes_job = start_generation_job(transcript_store, "notes")
+    job.depends_on = notes_job
+    notes = await generation_jobs.wait(notes_job)
+
+    concise_summary = await summarizer.summary(notes, job)
+    await transcript_store.save_summary(concise_summary)
+    video_cache.update_size(transcript_store.video_id)
+    return concise_summary
+
+def start_generation_job(transcript_store, mode):
+    """Start (or attach to) the notes/summary job for a video; finished results come back as a done job."""
+    video_id = transcript_store.video_id
+    if mode == "notes" and transcript_store.is_notes_generated:
+        return generation_jobs.completed(video_id, mode, transcript_store.notes)
+    if mode == "summary" and transcript_store.is_summary_generated:
+        return generation_jobs.completed(video_id, mode, transcript_store.summary)
+    runner = run_notes_job if mode == "notes" else run_summary_job
+    return generation_jobs.start(video_id, mode, lambda job: runner(transcript_store, job))
+
+async def generation_response(video_id, mode, field):
+    """POST starts a background job and returns its id; GET waits for the result as before."""
     try:
-        if f"{video_id}_transcript" in globals():
-            transcript_store = globals()[f"{video_id}_transcript"]
-            
-            if transcript_store.is_summary_generated:
-                concise_summary = generate_summary_directly(transcript_store.summary)
-                return jsonify({"concise_summary": concise_summary}), 200
-            else:
-                if transcript_store.is_notes_generated:
-                    concise_summary = generate_summary_directly(transcript_store.notes)
-                    transcript_store.summary = concise_summary
-                    transcript_store.is_summary_generated = True
-                else:
-                    trans_temp = transcript_store.whole_string_transcript_english
-                    notes = get_notes_from_summary(trans_temp)
-                    transcript_store.notes = notes
-                    transcript_store.is_notes_generated = True
-                    
-                    concise_summary = generate_summary_directly(notes)
-                    transcript_store.summary = concise_summary
-                    transcript_store.is_summary_generated = True
-                    
-                    return jsonify({"concise_summary": concise_summary}), 200
-        else: 
-            globals()[f"{video_id}_transcript"] = await TranscriptStore.create(video_id)
-            return await concise_summary_api(video_id)
+        transcript_store = await get_or_create_transcript_store(video_id)
+        if not transcript_store.is_transcript_exists:
+            return jsonify({"error": "No transcript available for this video"}), 404
+
+        job = start_generation_job(transcript_store, mode)
+        if request.method == 'POST':
+            return jsonify(job.progress()), 202 if job.is_active() else 200
+
+        result = await generation_jobs.wait(job)
+        return jsonify({field: result}), 200
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-    
-@app.route('/notes/<video_id>', methods=['GET'])
+
+@app.route('/concise_summary/<video_id>', methods=['GET', 'POST'])
+async def concise_summary_api(video_id):
+    return await generation_response(video_id, "summary", "concise_summary")
+
+@app.route('/notes/<video_id>', methods=['GET', 'POST'])
 async def notes(video_id):
-    try:
-        if f"{video_id}_transcript" in globals():
-            transcript_store = globals()[f"{video_id}_transcript"]
-            
-            if transcript_store.is_notes_generated:
-                return jsonify({"notes": transcript_store.notes}), 200
-            else:
-                trans_temp = transcript_store.whole_string_transcript_english
-                notes = get_notes_from_summary(trans_temp)
-                transcript_store.is_notes_generated = True
-                transcript_store.notes = notes
-                
-                return jsonify({"notes": notes}), 200
-        else: 
-            globals()[f"{video_id}_transcript"] = await TranscriptStore.create(video_id)
-            return await concise_summary_api(video_id)
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+    return await generation_response(video_id, "notes", "notes")
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress (parts done / total) and partial output of a notes/summary job."""
+    job = generation_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job.progress())
 
 @app.route('/precompute/<video_id>', methods=['GET'])
 async def precompute_route(video_id):
@@ -791,6 +968,53 @@ async def precompute_route(video_id):
 
     return jsonify(precompute_result), 200
 
+async def load_query_context(video_id):
+    """ Precomputes video_id if needed and returns its vector store and metadata, or {"error": ...} """
+    if not is_processed(video_id):
+        precompute_result = await precompute(video_id)
+        if "error" in precompute_result:
+            return {"error": precompute_result["error"]}
+
+    vector_store = None
+    if not GLOBAL_INDEX_MODE:
+        try:
+            vector_store = load_faiss_index(video_id)
+        except (KeyError, RuntimeError) as e:
+            return {"error": f"Failed to load FAISS index: {str(e)}"}
+
+        if not vector_store:
+            return {"error": "Failed to load FAISS index"}
+
+    state = video_cache.get(video_id)
+    cached_data = state.metadata if state is not None and state.metadata else {}
+    if "chunks" not in cached_data:
+        return {"error": "Transcript not found in cache"}
+
+    return {
+        "vector_store": vector_store,
+        "yt_channel": cached_data.get("yt_channel", "Unknown Channel"),
+        "yt_title": cached_data.get("yt_title", "Unknown Title")
+    }
+
+def retrieve_for_query(video_id, vector_store, query_vector):
+    # One search serves as both the relevance check and the retrieval step
+    if GLOBAL_INDEX_MODE:
+        return retrieve_global_chunks(query_vector, [video_id])
+    return retrieve_chunks(vector_store, query_vector)
+
+def answer_sources(hits):
+    """ Time ranges of the chunks the answer was drawn from, so the sidebar can cite them """
+    return [
+        {
+            "start": doc.metadata.get("start"),
+            "end": doc.metadata.get("end"),
+            "start_label": format_timestamp(doc.metadata["start"]) if doc.metadata.get("start") is not None else None,
+            "end_label": format_timestamp(doc.metadata["end"]) if doc.metadata.get("end") is not None else None,
+            "similarity": round(similarity, 4)
+        }
+        for doc, similarity in hits
+    ]
+
 @app.route('/process', methods=['POST'])
 async def process():
     """ Processes user query using stored transcript and FAISS index from memory. """
@@ -802,65 +1026,363 @@ async def process():
     if not video_id or not query:
         return jsonify({'error': 'Missing video_id or query'}), 400
 
-    if not is_processed(video_id):
-        precompute_result = await precompute(video_id)
-        if "error" in precompute_result:
-            return jsonify({"error": precompute_result["error"]}), 400
+    context = await load_query_context(video_id)
+    if "error" in context:
+        return jsonify({"error": context["error"]}), 400
+    context["generation"] = answer_cache.generation(video_id)  # Answers built on this index; a rebuild bumps it
+
+    # ?stream=1 sends Server-Sent Events: context, draft answer tokens, then the refined answer
+    if request.args.get("stream", "false").lower() in ("1", "true"):
+        response = Response(stream_process_events(video_id, query, mode, context), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        response.timeout = None  # The refinement step can outlast the default response timeout
+        return response
+
+    yt_channel = context["yt_channel"]
+    yt_title = context["yt_title"]
+    timings = {}
+    request_start = time.perf_counter()
+
+    # Repeated questions skip embedding, retrieval, generation and refinement entirely
+    cached = answer_cache.lookup_text(video_id, mode, query)
+    if cached is not None:
+        return cached_answer_response(cached, timings, request_start)
+
+    stage_start = time.perf_counter()
+    query_vector = await asyncio.to_thread(embedding_model.embed_query, query)
+    timings["embed_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
 
+    cached = answer_cache.lookup_vector(video_id, mode, query_vector)
+    if cached is not None:
+        return cached_answer_response(cached, timings, request_start)
+
+    stage_start = time.perf_counter()
+    hits = await asyncio.to_thread(retrieve_for_query, video_id, context["vector_store"], query_vector)
+    timings["search_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+    if not hits:
+        return jsonify({"final_answer": "Query out of context.", "timings": timings}), 200
+
+    sources = answer_sources(hits)
+
+    stage_start = time.perf_counter()
+    context_answer = await asyncio.to_thread(search_query_with_llm, hits, query)
+    timings["generate_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+    response = {
+        "channel": yt_channel,
+        "title": yt_title,
+        "sources": sources
+    }
+    stage_start = time.perf_counter()
+    refined_answer, refinement = await refine_with_gate(video_id, query, mode, hits, context_answer, yt_channel, yt_title,
+                                                        lambda late_answer: cache_late_refinement(video_id, mode, query, query_vector, response, late_answer, request_start, context["generation"]))
+    if refinement["refine"]:
+        timings["refine_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+    response["final_answer"] = refined_answer
+    answer_cache.add(video_id, mode, query, query_vector, response,
+                     round((time.perf_counter() - request_start) * 1000, 1), context["generation"])
+    return jsonify({**response, "refinement": refinement, "cache": None, "timings": timings})
+
+async def refine_with_gate(video_id, query, mode, hits, context_answer, yt_channel, yt_title, on_late_answer):
+    """
+    Runs refine_answer_with_serper only when the refinement gate says it is worth it, and
+    waits at most REFINE_LATENCY_BUDGET for it. Past the budget the draft is returned and
+    the refinement keeps running; on_late_answer(answer) receives its result. If every
+    refinement crew is busy the draft is returned at once rather than queued.
+    Returns (answer, decision) with the decision's outcome filled in.
+    """
+    decision = refine_gate.decide(query, hits, context_answer, mode)
+    if not decision["refine"]:
+        decision["outcome"] = "skipped"
+        refine_gate.record(video_id, query, decision, "skipped")
+        return context_answer, decision
+
+    if refine_slots.locked():
+        decision["outcome"] = "busy"
+        refine_gate.record(video_id, query, decision, "busy")
+        return context_answer, decision
+
+    await refine_slots.acquire()  # Free, so this returns at once
+    start = time.perf_counter()
+    task = asyncio.get_running_loop().run_in_executor(
+        refine_executor, refine_answer_with_serper, query, context_answer, yt_channel, yt_title)
+    task.add_done_callback(lambda _: refine_slots.release())
     try:
-        vector_store = load_faiss_index(video_id)
-    except (KeyError, RuntimeError) as e:
-        return jsonify({"error": f"Failed to load FAISS index: {str(e)}"}), 400
+        refined_answer = await asyncio.wait_for(asyncio.shield(task), REFINE_LATENCY_BUDGET)
+    except asyncio.TimeoutError:
+        decision["outcome"] = "budget_exceeded"
+
+        def finish_late(task):
+            refine_ms = round((time.perf_counter() - start) * 1000, 1)
+            if task.cancelled() or task.exception() is not None:
+                if not task.cancelled():
+                    print(f"Error refining answer: {str(task.exception())}")
+                refine_gate.record(video_id, query, decision, "failed", refine_ms)
+                return
+            refine_gate.record(video_id, query, decision, "late", refine_ms)
+            on_late_answer(task.result())
+
+        task.add_done_callback(finish_late)
+        return context_answer, decision
+    except Exception as e:
+        print(f"Error refining answer: {str(e)}")
+        decision["outcome"] = "failed"
+        refine_gate.record(video_id, query, decision, "failed", round((time.perf_counter() - start) * 1000, 1))
+        return context_answer, decision
 
-    if not vector_store:
-        return jsonify({"error": "Failed to load FAISS index"}), 400
+    decision["outcome"] = "refined"
+    refine_gate.record(video_id, query, decision, "refined", round((time.perf_counter() - start) * 1000, 1))
+    return refined_answer, decision
 
-    cached_data = metadata_cache.get(video_id, {})
-    transcript = cached_data.get("transcript")
-    yt_channel = cached_data.get("yt_channel", "Unknown Channel")
-    yt_title = cached_data.get("yt_title", "Unknown Title")
-    chunks = cached_data.get("chunks")
+def cache_late_refinement(video_id, mode, query, query_vector, response, refined_answer, request_start, generation):
+    """ A refinement that finished after its request was answered still serves the next asker, unless the index was rebuilt meanwhile """
+    answer_cache.add(video_id, mode, query, query_vector, {**response, "final_answer": refined_answer},
+                     round((time.perf_counter() - request_start) * 1000, 1), generation)
 
-    if not transcript:
-        return jsonify({"error": "Transcript not found in cache"}), 400
+def cached_answer_response(cached, timings, request_start):
+    response, match = cached
+    timings["cache_ms"] = round((time.perf_counter() - request_start) * 1000, 1)
+    return jsonify({**response, "cache": match, "timings": timings})
 
-    if not check_query_relevance(vector_store, query):
-        return jsonify({"final_answer": "Query out of context."}), 200
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    context_answer = search_query_with_llm(vector_store, chunks, query)
-    refined_answer = refine_answer_with_serper(query, context_answer, yt_channel, yt_title) if mode else context_answer
+async def stream_process_events(video_id, query, mode, context):
+    """
+    The /process pipeline as Server-Sent Events. Emits "context" (sources, title, channel)
+    as soon as retrieval is done, a "token" per draft answer fragment, "draft" with the whole
+    draft, "refined" if refinement runs, and finally "done" with the /process JSON payload.
+    Blocking steps run in threads so events are flushed as they happen.
+    """
+    yt_channel = context["yt_channel"]
+    yt_title = context["yt_title"]
+    timings = {}
+    request_start = time.perf_counter()
+    try:
+        cached = answer_cache.lookup_text(video_id, mode, query)
+        if cached is None:
+            stage_start = time.perf_counter()
+            query_vector = await asyncio.to_thread(embedding_model.embed_query, query)
+            timings["embed_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+            cached = answer_cache.lookup_vector(video_id, mode, query_vector)
+
+        if cached is not None:
+            response, match = cached
+            timings["cache_ms"] = round((time.perf_counter() - request_start) * 1000, 1)
+            yield sse_event("context", {"sources": response["sources"], "channel": response["channel"], "title": response["title"]})
+            yield sse_event("done", {**response, "cache": match, "timings": timings})
+            return
+
+        stage_start = time.perf_counter()
+        hits = await asyncio.to_thread(retrieve_for_query, video_id, context["vector_store"], query_vector)
+        timings["search_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+        if not hits:
+            yield sse_event("done", {"final_answer": "Query out of context.", "timings": timings})
+            return
+
+        sources = answer_sources(hits)
+        yield sse_event("context", {"sources": sources, "channel": yt_channel, "title": yt_title})
+
+        stage_start = time.perf_counter()
+        draft = []
+        async for text in stream_query_with_llm(hits, query):
+            if not draft:
+                timings["first_token_ms"] = round((time.perf_counter() - request_start) * 1000, 1)
+            draft.append(text)
+            yield sse_event("token", {"text": text})
+        context_answer = "".join(draft)
+        timings["generate_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+        yield sse_event("draft", {"answer": context_answer})
+
+        response = {
+            "channel": yt_channel,
+            "title": yt_title,
+            "sources": sources
+        }
+        stage_start = time.perf_counter()
+        refined_answer, refinement = await refine_with_gate(video_id, query, mode, hits, context_answer, yt_channel, yt_title,
+                                                            lambda late_answer: cache_late_refinement(video_id, mode, query, query_vector, response, late_answer, request_start, context["generation"]))
+        if refinement["refine"]:
+            timings["refine_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+        if refinement["outcome"] == "refined":
+            yield sse_event("refined", {"answer": refined_answer})
+
+        response["final_answer"] = refined_answer
+        answer_cache.add(video_id, mode, query, query_vector, response,
+                         round((time.perf_counter() - request_start) * 1000, 1), context["generation"])
+        yield sse_event("done", {**response, "refinement": refinement, "cache": None, "timings": timings})
+    except Exception as e:
+        print(f"❌ Error streaming answer for {video_id}: {str(e)}")
+        yield sse_event("error", {"error": str(e)})
+
+@app.route('/segment_at/<video_id>', methods=['GET'])
+async def segment_at(video_id):
+    """ Maps a playback time (?t=<seconds>) to the closest transcript segment and its Q&A chunk. """
+    try:
+        seconds = float(request.args.get("t", 0))
+    except ValueError:
+        return jsonify({"error": "t must be a number of seconds"}), 400
+
+    transcript_store = await get_or_create_transcript_store(video_id)
+    if not transcript_store.is_transcript_exists:
+        return jsonify({"error": "No transcript available for this video"}), 404
+
+    segment_index = transcript_store.segment_at(seconds)
+    if segment_index is None:
+        return jsonify({"error": "Transcript has no timing data"}), 404
+
+    state = video_cache.get(video_id)
+    chunk_starts = state.metadata.get("chunk_starts") if state is not None and state.metadata else None
 
     return jsonify({
-        "final_answer": refined_answer,
-        "channel": yt_channel,
-        "title": yt_title
+        "segment_index": segment_index,
+        "segment": transcript_store.segments.row(segment_index),
+        "segment_start": transcript_store.segments.starts[segment_index],
+        "segment_end": transcript_store.segments.ends[segment_index],
+        "chunk_index": containing_index(chunk_starts, seconds) if chunk_starts else None
     })
 
+@app.route('/search_all', methods=['POST'])
+async def search_all():
+    """ Searches transcript chunks across all indexed videos, or a given subset, using the shared index. """
+    if not GLOBAL_INDEX_MODE:
+        return jsonify({"error": "Cross-video search requires GLOBAL_INDEX_MODE=true"}), 400
+
+    data = await request.json
+    query = data.get('query')
+    video_ids = data.get('video_ids')
+    if video_ids is not None and (not isinstance(video_ids, list) or not all(isinstance(v, str) for v in video_ids)):
+        return jsonify({'error': 'video_ids must be a list of strings'}), 400
+
+    try:
+        k = max(1, min(int(data.get('k', 10)), SEARCH_ALL_MAX_K))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k must be an integer'}), 400
+
+    if not query:
+        return jsonify({'error': 'Missing query'}), 400
+
+    query_vector = await asyncio.to_thread(embedding_model.embed_query, query)
+    hits = await asyncio.to_thread(global_index.search, query_vector, k, video_ids)
+    results = [hit for hit in hits if hit["similarity"] >= SIMILARITY_THRESHOLD]
+    return jsonify({"query": query, "results": results})
+
 @app.route('/cache_status', methods=['GET'])
 def cache_status():
     """ Returns information about what's currently in the cache """
+    entries = video_cache.entries()
     return jsonify({
-        "indexed_videos": list(index_cache.keys()),
-        "videos_with_metadata": list(metadata_cache.keys())
+        "indexed_videos": [entry["video_id"] for entry in entries if entry["has_index"]],
+        "videos_with_metadata": [entry["video_id"] for entry in entries if entry["has_metadata"]],
+        "stats": video_cache.stats(),
+        "embedding_cache": embedding_model.stats(),
+        "audio_cache": audio_cache.stats(),
+        "mtranslate_limiter": mtranslate_limiter.stats(),
+        "tts": tts_backend.stats(),
+        "summarizer": summarizer.stats(),
+        "generation_jobs": generation_jobs.stats(),
+        "answer_cache": answer_cache.stats(),
+        "components": components.stats(),
+        "refine_gate": refine_gate.stats(),
+        "metadata": metadata_service.stats(),
+        "global_index": global_index.stats() if GLOBAL_INDEX_MODE else None,
+        "entries": entries
     })
 
-async def process_and_generate_audio(video_id, target_language, segment_number):
-    try:
-        transcript_data = globals()[f"{video_id}_transcript"]
-        print("Inside process_transcript")
-        if globals()[f"{video_id}_transcript"] and transcript_data.is_transcript_exists:
-            temp_trans = await process_transcript(
-                transcript_data.transcript_original,
-                transcript_data.whole_string_transcript_english,
-                video_id, transcript_data.original_video_lang, target_language, str(segment_number)
-            )
-            print("inside create_audio_segments")
-            await create_audio_segments(temp_trans, video_id, target_language)
-            print(f"✅ Background processing completed for segment {segment_number}.")
-        else:
-            print(f"⚠ Transcript not found for {video_id}, skipping background processing.")
-    except Exception as e:
-        print(f"❌ Error in background processing: {e}")
+# --- Dub Prefetching ---
+async def dub_segments(video_id, target_language, segment_numbers):
+    """Translate and synthesise the given segments; the prefetch scheduler's unit of work."""
+    transcript_data = await get_or_create_transcript_store(video_id)
+    if not transcript_data.is_transcript_exists:
+        print(f"⚠ Transcript not found for {video_id}, skipping dubbing.")
+        return
+    temp_trans = await process_transcript(transcript_data, target_language, segment_numbers)
+    await create_audio_segments(temp_trans, video_id, target_language)
+
+dub_prefetcher = DubPrefetchScheduler(dub_segments, concurrency=PREFETCH_CONCURRENCY, batch_size=PREFETCH_BATCH_SIZE)
+
+def schedule_prefetch(transcript_store, target_language, segment_number):
+    """Queue the uncached segments around the playhead for background dubbing."""
+    video_id = transcript_store.video_id
+    segments = transcript_store.segments
+    voice = voice_for(target_language)
+    first = max(1, segment_number - PREFETCH_BEHIND)
+    last = min(len(segments), segment_number + PREFETCH_AHEAD)
+    missing = [
+        segment_no for segment_no in range(first, last + 1)
+        if segment_no != segment_number  # Produced by the request itself
+        and audio_cache.peek(video_id, target_language, segment_no, voice, text_hash(segments.text_at(segment_no - 1))) is None
+    ]
+    dub_prefetcher.schedule(video_id, target_language, segment_number, first, last, missing)
+
+# --- Whole-Video Dubs ---
+dub_jobs = DubJobManager(max_jobs=DUB_MAX_JOBS, retention_seconds=DUB_JOB_RETENTION)
+
+def start_dub_job(transcript_store, target_language):
+    """Start (or attach to) the job rendering every segment of a video into one track."""
+    video_id = transcript_store.video_id
+    segments = transcript_store.segments
+    voice = voice_for(target_language)
+
+    def cached_path(segment_no):
+        return audio_cache.peek(video_id, target_language, segment_no, voice, text_hash(segments.text_at(segment_no - 1)))
+
+    job = DubJob(
+        video_id, target_language, len(segments),
+        translate=lambda segment_numbers: process_transcript(transcript_store, target_language, segment_numbers),
+        synthesize=lambda segment: synthesize_segment(segment, video_id, target_language),
+        cached_path=cached_path,
+        after_audio=lambda: asyncio.to_thread(audio_cache.flush),
+        translate_batch_size=TRANSLATION_BATCH_SIZE,
+        tts_workers=DUB_TTS_WORKERS,
+        queue_size=DUB_QUEUE_SIZE
+    )
+    return dub_jobs.start(job, segments.starts.tolist(), segments.ends.tolist())
+
+@app.route('/dub/<video_id>/<target_language>', methods=['GET', 'POST'])
+async def dub(video_id, target_language):
+    """
+    GET serves the rendered dub track (with HTTP Range support), or starts rendering it.
+    POST re-renders the track, e.g. after segments failed.
+    """
+    job = dub_jobs.get(video_id, target_language)
+    job_running = job is not None and job.status in ("queued", "running", "rendering")
+    if request.method == 'GET' and not job_running and load_dub_index(video_id, target_language) is not None:
+        _, track_path, _ = dub_paths(video_id, target_language)
+        return await send_file(track_path, mimetype="audio/mpeg", conditional=True)
+
+    transcript_store = await get_or_create_transcript_store(video_id)
+    if not transcript_store.is_transcript_exists:
+        return jsonify({"error": "No transcript available for this video"}), 404
+
+    job = start_dub_job(transcript_store, target_language)
+    return jsonify(job.progress()), 202
+
+@app.route('/dub/<video_id>/<target_language>/status', methods=['GET'])
+def dub_status(video_id, target_language):
+    job = dub_jobs.get(video_id, target_language)
+    if job is not None:
+        return jsonify(job.progress())
+    if load_dub_index(video_id, target_language) is not None:
+        return jsonify({"video_id": video_id, "language": target_language, "status": "done"})
+    return jsonify({"error": "No dub for this video and language"}), 404
+
+@app.route('/dub/<video_id>/<target_language>/index', methods=['GET'])
+def dub_index(video_id, target_language):
+    """Seek index of a rendered dub: each segment's track time range and byte range."""
+    index = load_dub_index(video_id, target_language)
+    if index is None:
+        return jsonify({"error": "Dub not rendered yet"}), 404
+    return jsonify(index)
+
+@app.route('/prefetch_status', methods=['GET'])
+def prefetch_status():
+    """Returns the dub prefetch scheduler's queue and counters"""
+    return jsonify(dub_prefetcher.stats())
 
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=5000, debug=True)
@@ -0,0 +1,177 @@
+import abc
+import asyncio
+import time
+import aiohttp
+
+UNKNOWN_METADATA = {"channel": "Unknown Channel", "title": "Unknown Title"}
+
+def _watch_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+# --- Provider Interface ---
+class MetadataProvider(abc.ABC):
+    """Looks up a video's channel and title. fetch() returns {"channel", "title"} or raises."""
+    name = None
+
+    @abc.abstractmethod
+    async def fetch(self, video_id):
+        """{"channel", "title"} for video_id; raises if the provider cannot describe it."""
+
+    async def close(self):
+        pass
+
+# --- oEmbed ---
+class OEmbedMetadataProvider(MetadataProvider):
+    """
+    YouTube's public oEmbed endpoint: one small JSON request with author_name and title,
+    no page scraping or player resolution. Uses one shared aiohttp session.
+    """
+    name = "oembed"
+    OEMBED_URL = "https://www.youtube.com/oembed"
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+        self._session = None
+
+    def _shared_session(self):
+        # Created lazily because the session binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def fetch(self, video_id):
+        params = {"url": _watch_url(video_id), "format": "json"}
+        async with self._shared_session().get(self.OEMBED_URL, params=params) as response:
+            response.raise_for_status()
+            info = await response.json(content_type=None)
+        return {"channel": info.get("author_name") or UNKNOWN_METADATA["channel"],
+                "title": info.get("title") or UNKNOWN_METADATA["title"]}
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+# --- yt-dlp ---
+class YtDlpMetadataProvider(MetadataProvider):
+    """
+    yt-dlp fallback for videos oEmbed cannot describe (e.g. embedding disabled).
+
+    Extracts with process=False, so formats are never resolved, in a worker thread so
+    the event loop keeps serving. `lease` is a context manager factory yielding a
+    YoutubeDL client, so clients come from the shared component pool.
+    """
+    name = "yt_dlp"
+
+    def __init__(self, lease):
+        self.lease = lease
+
+    def _extract(self, video_id):
+        with self.lease() as ydl:
+            info = ydl.extract_info(_watch_url(video_id), download=False, process=False)
+        return {"channel": info.get("uploader") or info.get("channel") or UNKNOWN_METADATA["channel"],
+                "title": info.get("title") or UNKNOWN_METADATA["title"]}
+
+    async def fetch(self, video_id):
+        return await asyncio.to_thread(self._extract, video_id)
+
+# --- Local Stub ---
+class StubMetadataProvider(MetadataProvider):
+    """Offline provider for tests and benchmarks: canned entries, else a title derived from the id."""
+    name = "stub"
+
+    def __init__(self, entries=None, latency=0.0):
+        self.entries = entries or {}
+        self.latency = latency
+
+    async def fetch(self, video_id):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.entries.get(video_id, {"channel": "Stub Channel", "title": f"Video {video_id}"})
+
+METADATA_PROVIDERS = {
+    OEmbedMetadataProvider.name: OEmbedMetadataProvider,
+    YtDlpMetadataProvider.name: YtDlpMetadataProvider,
+    StubMetadataProvider.name: StubMetadataProvider
+}
+
+def create_metadata_provider(name, **options):
+    """Instantiate a registered provider by name."""
+    if name not in METADATA_PROVIDERS:
+        raise ValueError(f"Unknown metadata provider '{name}', expected one of {sorted(METADATA_PROVIDERS)}")
+    return METADATA_PROVIDERS[name](**options)
+
+# --- Cached Lookup ---
+class MetadataService:
+    """
+    Video metadata from a chain of providers, backed by the persistent VideoStore.
+
+    Providers are tried in order until one succeeds; the result is stored as the
+    video's "metadata" record and served from there until ttl_seconds pass.
+    Concurrent lookups of one video share a single fetch. A video no provider can
+    describe gets UNKNOWN_METADATA, which is not cached, so it is retried next time.
+    """
+    def __init__(self, providers, store, ttl_seconds=7 * 24 * 3600):
+        self.providers = providers
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.fetch_ms = {provider.name: 0.0 for provider in providers}
+        self.fetches = {provider.name: 0 for provider in providers}
+        self.errors = {provider.name: 0 for provider in providers}
+
+    async def get(self, video_id):
+        """{"channel", "title"} for video_id; never raises."""
+        record = await asyncio.to_thread(self.store.get, video_id, "metadata")
+        if record is not None and time.time() - record["fetched_at"] < self.ttl_seconds:
+            self.hits += 1
+            return {"channel": record["channel"], "title": record["title"]}
+
+        self.misses += 1
+        task = self._inflight.get(video_id)
+        if task is None:
+            task = self._inflight[video_id] = asyncio.ensure_future(self._fetch(video_id))
+            task.add_done_callback(lambda _: self._inflight.pop(video_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, video_id):
+        for provider in self.providers:
+            start = time.perf_counter()
+            try:
+                metadata = await provider.fetch(video_id)
+            except Exception as e:
+                self.errors[provider.name] += 1
+                print(f"⚠ {provider.name} metadata lookup failed for {video_id}: {str(e)}")
+                continue
+            finally:
+                self.fetch_ms[provider.name] += (time.perf_counter() - start) * 1000
+            self.fetches[provider.name] += 1
+            print(f"🏷️ Metadata for {video_id} from {provider.name}: {metadata['title']}")
+            try:
+                await asyncio.to_thread(self.store.put, video_id, "metadata", {**metadata, "fetched_at": time.time()})
+            except Exception as e:
+                print(f"⚠ Failed to persist metadata for {video_id}: {str(e)}")
+            return metadata
+        self.failures += 1
+        return dict(UNKNOWN_METADATA)
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+    def stats(self):
+        return {
+            "providers": [provider.name for provider in self.providers],
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "avg_fetch_ms": {
+                name: round(self.fetch_ms[name] / (self.fetches[name] + self.errors[name]), 1)
+                for name in self.fetch_ms if self.fetches[name] + self.errors[name]
+            }
+        }
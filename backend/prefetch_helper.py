@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+
+# --- Per-Video Prefetch State ---
+class _PrefetchTarget:
+    """Playhead, window and queued/running segments for one (video_id, language) pair."""
+    def __init__(self):
+        self.playhead = None
+        self.first = None
+        self.last = None
+        self.generation = 0
+        self.queued = set()
+        self.running = {}  # segment number -> task running the batch that contains it
+
+    def in_window(self, segment_no):
+        return self.first <= segment_no <= self.last
+
+# --- Scheduler ---
+class DubPrefetchScheduler:
+    """
+    Bounded background scheduler for dubbing segments ahead of playback.
+
+    Segments are queued per (video_id, language) and served by at most
+    `concurrency` workers across all videos, nearest to the playhead first
+    (ahead before behind on ties). Queued segments are deduplicated, and a seek
+    drops queued work and cancels running work that falls outside the new window.
+    Workers claim up to `batch_size` contiguous queued segments at a time and call
+    `job(video_id, language, segment_numbers)`.
+    """
+    def __init__(self, job, concurrency=2, batch_size=4):
+        self.job = job
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self._targets = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._workers = []
+        self.scheduled = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def _ensure_workers(self):
+        """Start the workers on first use, inside the running event loop."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def schedule(self, video_id, lang, playhead, first, last, segment_numbers):
+        """
+        Move the playhead for (video_id, lang) to `playhead` with window [first, last]
+        and queue the given segments. Returns the number of newly queued segments.
+        """
+        self._ensure_workers()
+        key = (video_id, lang)
+        target = self._targets.setdefault(key, _PrefetchTarget())
+
+        moved = (target.playhead, target.first, target.last) != (playhead, first, last)
+        target.playhead, target.first, target.last = playhead, first, last
+        if moved:
+            self._reprioritize(key, target)
+
+        added = 0
+        for segment_no in segment_numbers:
+            if not target.in_window(segment_no):
+                continue
+            if segment_no in target.queued or segment_no in target.running:
+                self.deduplicated += 1
+                continue
+            target.queued.add(segment_no)
+            self._push(key, target, segment_no)
+            added += 1
+
+        self.scheduled += added
+        if added:
+            self._wakeup.set()
+        return added
+
+    def _priority(self, target, segment_no):
+        distance = segment_no - target.playhead
+        return (abs(distance), 0 if distance >= 0 else 1)
+
+    def _push(self, key, target, segment_no):
+        heapq.heappush(self._heap, (self._priority(target, segment_no), next(self._counter), key, target.generation, segment_no))
+
+    def _reprioritize(self, key, target):
+        """After a seek: drop work outside the new window and re-rank what is left."""
+        target.generation += 1  # Heap entries from older generations are skipped when popped
+
+        dropped = {segment_no for segment_no in target.queued if not target.in_window(segment_no)}
+        target.queued -= dropped
+        self.cancelled += len(dropped)
+        for segment_no in target.queued:
+            self._push(key, target, segment_no)
+
+        stale_tasks = {}
+        for segment_no, task in target.running.items():
+            stale_tasks.setdefault(task, []).append(segment_no)
+        for task, batch in stale_tasks.items():
+            if not any(target.in_window(segment_no) for segment_no in batch):
+                task.cancel()
+
+    def _pop_batch(self):
+        """
+        Claim the best queued segment plus the contiguous queued run around it, growing
+        forward (playback order) first and backward once nothing follows, so segments
+        queued behind the playhead are batched too.
+        """
+        while self._heap:
+            _, _, key, generation, segment_no = heapq.heappop(self._heap)
+            target = self._targets.get(key)
+            if target is None or generation != target.generation or segment_no not in target.queued:
+                continue
+            first = last = segment_no
+            while last - first + 1 < self.batch_size:
+                if last + 1 in target.queued:
+                    last += 1
+                elif first - 1 in target.queued:
+                    first -= 1
+                else:
+                    break
+            batch = list(range(first, last + 1))
+            target.queued.difference_update(batch)
+            return key, target, batch
+        return None
+
+    async def _worker(self):
+        while True:
+            claimed = self._pop_batch()
+            if claimed is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            (video_id, lang), target, batch = claimed
+            task = asyncio.create_task(self.job(video_id, lang, batch))
+            for segment_no in batch:
+                target.running[segment_no] = task
+            try:
+                await task
+                self.completed += len(batch)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # The worker itself is being shut down
+                self.cancelled += len(batch)
+                print(f"⏹ Cancelled prefetch of {video_id} ({lang}) segments {batch[0]}-{batch[-1]} after seek")
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"❌ Prefetch failed for {video_id} ({lang}) segments {batch}: {str(e)}")
+            finally:
+                for segment_no in batch:
+                    if target.running.get(segment_no) is task:
+                        del target.running[segment_no]
+                if not target.queued and not target.running and self._targets.get((video_id, lang)) is target:
+                    del self._targets[(video_id, lang)]
+
+    def claim(self, video_id, lang, segment_no):
+        """
+        Take a segment out of the queue because a request is producing it now.
+        Returns the background task already producing it, if any.
+        """
+        target = self._targets.get((video_id, lang))
+        if target is None:
+            return None
+        target.queued.discard(segment_no)
+        return target.running.get(segment_no)
+
+    async def run_now(self, video_id, lang, segment_no):
+        """
+        Produce one segment immediately for a waiting request, outside the concurrency cap.
+        Reuses the background task if the segment is already being prefetched.
+        """
+        task = self.claim(video_id, lang, segment_no)
+        if task is not None:
+            try:
+                await asyncio.shield(task)
+                return
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception:
+                pass  # The background attempt failed; try again for this request
+        await self.job(video_id, lang, [segment_no])
+
+    def stats(self):
+        return {
+            "workers": len(self._workers),
+            "concurrency": self.concurrency,
+            "batch_size": self.batch_size,
+            "queued": sum(len(target.queued) for target in self._targets.values()),
+            "running": sum(len(target.running) for target in self._targets.values()),
+            "scheduled": self.scheduled,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "targets": [
+                {
+                    "video_id": video_id,
+                    "language": lang,
+                    "playhead": target.playhead,
+                    "window": [target.first, target.last],
+                    "queued": sorted(target.queued),
+                    "running": sorted(target.running)
+                }
+                for (video_id, lang), target in self._targets.items()
+                if target.queued or target.running
+            ]
+        }
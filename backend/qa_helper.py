@@ -0,0 +1,67 @@
+import os
+import yt_dlp
+from dotenv import load_dotenv
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain.prompts import PromptTemplate
+from langchain.chains.question_answering import load_qa_chain
+from crewai import Agent, Task, Crew, LLM, Process
+from crewai_tools import SerperDevTool
+
+# Load environment variables
+load_dotenv()
+os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
+os.environ["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
+os.environ["SERPER_API_KEY"] = os.getenv("SERPER_API_KEY", "")
+
+# Initialize models and tools
+llm = LLM(model="gemini/gemini-1.5-flash")
+llm_genai = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.4)
+serper_tool = SerperDevTool()
+
+# --- Question Answering Chain ---
+QA_PROMPT = PromptTemplate(template="""
+    You are an AI assistant helping users find relevant information from a video transcript.
+    Context: {context}
+    Question: {question}
+    Answer:
+    """, input_variables=["context", "question"])
+
+def get_conversational_chain():
+    chain = load_qa_chain(llm_genai, chain_type="stuff", prompt=QA_PROMPT)
+    return chain
+
+# --- Answer Refinement Crew ---
+def build_refinement_crew():
+    """ One answer refinement crew; kickoff() fills in the query placeholders on every run """
+    refinement_agent = Agent(
+        role="Answer Refinement Agent",
+        goal=(
+            "Enhance the generated response using the latest web data. If the query pertains to a YouTube channel, provide information specifically related to {yt_channel}. "
+            "If the query is based on the video title, ensure the response focuses on {yt_title} as referenced in the transcript."
+        ),
+        backstory="This agent verifies and refines responses using real-time search when needed. If no valid source is found, it relies solely on embeddings.",
+        verbose=True,
+        memory=True,
+        tools=[serper_tool],
+        llm=llm,
+        allow_delegation=False
+    )
+
+    refinement_task = Task(
+        description=(
+            "Improve the response by incorporating the latest web data for the query: {query} and the given context answer: {context_answer}. "
+            "Since the query is related to the YouTube channel {yt_channel} and video title {yt_title}, ensure that the response remains aligned with this context. "
+            "If no valid information is found online, generate the response only from embeddings and do not mention that the internet did not provide relevant details."
+            "Give the straight forward answer and dont provide unnecessary information"
+        ),
+        expected_output="A well-verified and refined response with accurate information. If no valid online sources are found, the response should explicitly state that the answer is based solely on embeddings.",
+        tools=[serper_tool],
+        agent=refinement_agent,
+    )
+
+    return Crew(agents=[refinement_agent], tasks=[refinement_task], verbose=True, process=Process.sequential)
+
+# --- yt-dlp Client ---
+def build_yt_dlp():
+    """ A metadata-only YoutubeDL client; nothing is downloaded """
+    return yt_dlp.YoutubeDL({"quiet": True, "skip_download": True})
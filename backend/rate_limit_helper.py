@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+# --- Token Bucket ---
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Allows bursts of up to `capacity` calls, refilled at `rate` tokens per second.
+    Callers only wait when the bucket is empty, unlike a fixed sleep before every call.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        # The lock keeps waiters in FIFO order so a burst cannot starve earlier callers
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self.waits += 1
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= tokens
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 3)
+        }
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import threading
+import time
+
+REFINE_LOG_PATH = os.path.join("data", "refine_gate.jsonl")
+
+# --- Query Classifier ---
+# Questions answered by the video itself. An explicit reference to the video, its speaker or
+# its content wins over any web cue, since the transcript is where the answer lives.
+_TRANSCRIPT_PATTERN = re.compile(
+    r"\b(this video|the video|in the (video|talk|lecture|tutorial|lesson)|speaker|presenter|instructor|talk|lecture|"
+    r"summar(y|ise|ize)|explain(ed|s)?|mention(ed|s)?|said|say|says|according to|timestamp|minute)\b"
+)
+# Questions that need facts from outside the transcript: recency, prices, the channel's
+# standing or other sources. Kept to time-sensitive or external phrasing; everyday words
+# like "who is", "link" or "update" appear in plenty of transcript questions.
+_WEB_PATTERN = re.compile(
+    r"\b(latest|current(ly)?|today|right now|as of|this (week|month|year)|recent(ly)?|news|price[sd]?|"
+    r"release date|released|subscribers?|other videos?|website|20\d\d)\b"
+)
+# Drafts that admit the context did not contain the answer.
+_UNSURE_PATTERN = re.compile(
+    r"(not (mentioned|provided|specified|discussed|covered|available)|(doesn't|does not|do not) (mention|say|specify|provide)|"
+    r"no information|not enough information|cannot (determine|answer)|can't (determine|answer)|unclear|i don't know)"
+)
+
+def classify_query(query):
+    """'web', 'transcript' or 'neutral', from keyword cues; microseconds, no model call."""
+    text = query.lower()
+    if _TRANSCRIPT_PATTERN.search(text):
+        return "transcript"
+    if _WEB_PATTERN.search(text):
+        return "web"
+    return "neutral"
+
+# --- Refinement Gate ---
+class RefinementGate:
+    """
+    Decides per /process query whether the web refinement pass is worth running.
+
+    Refines when the user asked for it (addition_mode) and either the query needs outside
+    facts, the draft admits it has no answer or is very short, or the best retrieved chunk
+    is a weak match. Confident transcript answers are returned as drafts. Every decision and
+    its outcome is logged as one JSON line to log_path so the thresholds can be tuned.
+    """
+    def __init__(self, min_similarity=0.55, min_answer_words=12, log_path=REFINE_LOG_PATH):
+        self.min_similarity = min_similarity
+        self.min_answer_words = min_answer_words
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.reasons = {}
+        self.outcomes = {}
+        self.refine_ms = 0.0
+        self.refine_count = 0
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+
+    def decide(self, query, hits, draft, addition_mode):
+        """Return the decision dict: refine (bool), reason and the signals it was based on."""
+        top_similarity = max((similarity for _, similarity in hits), default=0.0)
+        answer_words = len((draft or "").split())
+        query_class = classify_query(query)
+
+        if not addition_mode:
+            refine, reason = False, "disabled"
+        elif query_class == "web":
+            refine, reason = True, "web_query"
+        elif not draft or _UNSURE_PATTERN.search(draft.lower()):
+            refine, reason = True, "unsure_draft"
+        elif answer_words < self.min_answer_words and query_class != "transcript":
+            refine, reason = True, "short_draft"
+        elif top_similarity < self.min_similarity:
+            refine, reason = True, "weak_retrieval"
+        else:
+            refine, reason = False, "confident"
+
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return {
+            "refine": refine,
+            "reason": reason,
+            "query_class": query_class,
+            "top_similarity": round(float(top_similarity), 4),
+            "answer_words": answer_words
+        }
+
+    def record(self, video_id, query, decision, outcome, refine_ms=None):
+        """
+        Log a decision's outcome: skipped, busy (no refinement crew free), refined, late
+        (finished after the latency budget) or failed. Call once per decision, when its
+        outcome is final.
+        """
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if refine_ms is not None:
+            self.refine_ms += refine_ms
+            self.refine_count += 1
+        print(f"🚦 Refinement {outcome} for {video_id} ({decision['reason']}, class={decision['query_class']}, "
+              f"similarity={decision['top_similarity']}, words={decision['answer_words']}"
+              + (f", {refine_ms:.0f} ms)" if refine_ms is not None else ")"))
+        if self.log_path:
+            line = json.dumps({
+                "time": time.time(),
+                "video_id": video_id,
+                "query": query,
+                **decision,
+                "outcome": outcome,
+                "refine_ms": refine_ms
+            }, ensure_ascii=False)
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def stats(self):
+        return {
+            "min_similarity": self.min_similarity,
+            "min_answer_words": self.min_answer_words,
+            "reasons": self.reasons,
+            "outcomes": self.outcomes,
+            "avg_refine_ms": round(self.refine_ms / self.refine_count, 1) if self.refine_count else None
+        }
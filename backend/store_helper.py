@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DB_PATH = os.path.join("data", "agentplay.db")
+
+# Bump a kind's version whenever the shape of its records changes.
+# Records written with an older version are ignored and recomputed.
+RECORD_VERSIONS = {
+    "transcript": 3,
+    "notes": 2,  # v1 could contain "Error ..." text from failed chunks
+    "summary": 2,
+    "qa_metadata": 2,
+    "metadata": 1
+}
+
+# --- Persistent Video Store ---
+class VideoStore:
+    """
+    SQLite-backed store of per-video records (transcripts, translations, notes, summaries).
+
+    Each record is keyed by (video_id, kind) and tagged with the kind's version,
+    so a warm restart can serve previously processed videos without upstream calls.
+    Methods are blocking; call them through asyncio.to_thread from async code.
+    """
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " video_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " value TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (video_id, kind))"
+            )
+            self._conn.commit()
+
+    def get(self, video_id, kind):
+        """Return the decoded record for (video_id, kind), or None if missing or outdated."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, value FROM records WHERE video_id = ? AND kind = ?",
+                (video_id, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        version, value = row
+        if version != RECORD_VERSIONS.get(kind, 1):
+            print(f"♻️ Ignoring outdated {kind} record for {video_id} (v{version})")
+            return None
+        return json.loads(value)
+
+    def put(self, video_id, kind, value):
+        """Insert or replace the record for (video_id, kind) at the current version."""
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records (video_id, kind, version, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (video_id, kind, RECORD_VERSIONS.get(kind, 1), payload, time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, video_id, kind=None):
+        """Delete one record kind, or every record, for video_id."""
+        with self._lock:
+            if kind is None:
+                self._conn.execute("DELETE FROM records WHERE video_id = ?", (video_id,))
+            else:
+                self._conn.execute("DELETE FROM records WHERE video_id = ? AND kind = ?", (video_id, kind))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
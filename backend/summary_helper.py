@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import math
+import random
+import re
+from collections import OrderedDict
+
+NOTES_SYSTEM_PROMPT = (
+    "You are a professional note-taking assistant. Generate detailed, "
+    "well-structured notes from the following content. Include:\n"
+    "1. Key concepts and main ideas\n"
+    "2. Important technical terms\n"
+    "3. Logical structure with bullet points\n"
+    "4. Relevant examples (when helpful)\n"
+    "Format with clear headings and bullet points."
+)
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert summary generation assistant. Create a concise, "
+    "coherent summary that captures the essential information."
+    "Focus on:"
+    " Key points and main ideas,Logical flow between conceptsPreservation of important termsOmitting redundant examplesStructure as a single cohesive paragraph"
+)
+
+NOTES_SEPARATOR = "\n\n----------------------------------------\n\n"
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with Mistral's tokenizer
+
+def _is_rate_limited(e):
+    return getattr(e, "status_code", None) == 429 or "rate limit" in str(e).lower() or "429" in str(e)
+
+class SummarizationError(RuntimeError):
+    """A chunk could not be summarized; the notes/summary it belongs to must not be saved."""
+
+# --- Token-Aware Chunking ---
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text):
+    """Approximate token count; close enough to size chunks well inside the context window."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def chunk_text(text, max_tokens):
+    """
+    Split text into chunks of at most max_tokens, breaking only between sentences.
+
+    Auto-generated captions often have no punctuation, so a "sentence" longer than
+    max_tokens is split between words instead. Words are never cut.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in _SENTENCE_END.split(text.strip()):
+        pieces = [sentence]
+        if estimate_tokens(sentence) > max_tokens:
+            pieces = []
+            piece = []
+            piece_chars = -1  # Length of " ".join(piece)
+            for word in sentence.split():
+                if piece and piece_chars + 1 + len(word) > max_tokens * CHARS_PER_TOKEN:
+                    pieces.append(" ".join(piece))
+                    piece = []
+                    piece_chars = -1
+                piece.append(word)
+                piece_chars += 1 + len(word)
+            if piece:
+                pieces.append(" ".join(piece))
+
+        for piece in pieces:
+            tokens = estimate_tokens(piece) + 1  # Plus the joining space
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+# --- Node Cache ---
+class SummaryNodeCache:
+    """
+    LRU cache of summary tree node outputs keyed by (mode, hash of the node's input).
+
+    A node's input is its chunk (leaves) or its children's outputs (inner nodes), so
+    changing or appending one chunk misses only the nodes on that chunk's path to the root.
+    """
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(mode, text):
+        return mode, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        text = self._entries.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# --- Async Summarization Engine ---
+class SummarizationEngine:
+    """
+    asyncio-native notes and summary generation on Mistral's async client.
+
+    Text is chunked by estimated tokens on sentence boundaries. Notes are one section per
+    chunk in transcript order; summaries reduce the chunk summaries in a tree, fan_in
+    nodes at a time, so no single call sees more than fan_in summaries however long the
+    video is. Every node's output is cached by the hash of its input.
+
+    All requests share one semaphore, so concurrent notes/summary jobs together never
+    exceed max_concurrency calls in flight. Rate-limited calls back off exponentially
+    with jitter via asyncio.sleep, so nothing blocks the event loop.
+    """
+    def __init__(self, client, model, max_concurrency=4, max_retries=3, base_delay=2, chunk_tokens=2000,
+                 fan_in=4, cache_entries=4096):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.client = client
+        self.model = model
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.chunk_tokens = chunk_tokens
+        self.fan_in = fan_in
+        self.node_cache = SummaryNodeCache(cache_entries)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.calls = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    async def summarize_chunk(self, chunk, mode="summary"):
+        """
+        Summarize a single chunk of text.
+        Supports both 'notes' and 'summary' generation modes.
+        Raises SummarizationError if the chunk fails or stays rate limited.
+        """
+        if mode == "notes":
+            messages = [
+                {"role": "system", "content": NOTES_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Generate comprehensive notes from this content:\n\n{chunk}"}
+            ]
+        else:
+            messages = [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Generate a concise summary of this content:\n\n{chunk}"}
+            ]
+
+        for attempt in range(self.max_retries):
+            try:
+                async with self._semaphore:
+                    self.calls += 1
+                    response = await self.client.chat.complete_async(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.3 if mode == "summary" else 0.5  # More creative for notes
+                    )
+                return response.choices[0].message.content
+            except Exception as e:
+                if not _is_rate_limited(e):
+                    self.failures += 1
+                    raise SummarizationError(f"Error generating {mode} for chunk: {str(e)}") from e
+                self.rate_limited += 1
+                # Exponential backoff with jitter, outside the semaphore so other calls proceed
+                delay = self.base_delay * 2 ** attempt
+                delay = delay / 2 + random.uniform(0, delay / 2)
+                print(f"Rate limit exceeded. Retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})...")
+                await asyncio.sleep(delay)
+        self.failures += 1
+        raise SummarizationError(f"Failed to process chunk after {self.max_retries} retries")
+
+    async def _node(self, text, mode, job, key=None):
+        """
+        One tree node: the cached output for this input, or a fresh summarize_chunk.
+        Leaves report their output to job (if any) as partial output; inner nodes only count.
+        """
+        cache_key = self.node_cache.key(mode, text)
+        output = self.node_cache.get(cache_key)
+        if output is None:
+            output = await self.summarize_chunk(text, mode)
+            self.node_cache.put(cache_key, output)
+        if job is not None:
+            if key is not None:
+                job.part_done(key, output)
+            else:
+                job.step_done()
+        return output
+
+    def _tree_size(self, leaves):
+        """Number of inner nodes the reduce adds above `leaves` leaves."""
+        size = 0
+        while leaves > 1:
+            leaves = math.ceil(leaves / self.fan_in)
+            size += leaves
+        return size
+
+    async def _merge(self, group, job):
+        """One inner node; children with no text are left out, and nothing is left to summarize for an all-empty group."""
+        text = "\n".join(output for output in group if output.strip())
+        if not text:
+            if job is not None:
+                job.step_done()
+            return ""
+        return await self._node(text, "summary", job)
+
+    async def _reduce(self, outputs, job):
+        """Reduce ordered node outputs level by level, fan_in adjacent nodes per parent."""
+        while len(outputs) > 1:
+            groups = [outputs[i:i + self.fan_in] for i in range(0, len(outputs), self.fan_in)]
+            outputs = await asyncio.gather(*(self._merge(group, job) for group in groups))
+        return outputs[0]
+
+    async def notes(self, transcript, job=None):
+        """
+        Detailed notes for the transcript, one section per chunk in transcript order.
+        Raises SummarizationError if any chunk fails, rather than returning partial notes.
+        """
+        chunks = chunk_text(transcript, self.chunk_tokens)
+        if job is not None:
+            job.add_total(len(chunks))
+        sections = await asyncio.gather(*(self._node(chunk, "notes", job, ("notes", i)) for i, chunk in enumerate(chunks)))
+        notes = "".join(section + NOTES_SEPARATOR for section in sections)
+        return notes.replace("*", "").replace("#", "")
+
+    async def summary(self, transcript, job=None):
+        """
+        Concise summary: chunk summaries reduced in a fan_in-ary tree to a single one.
+        Raises SummarizationError if any chunk or merge fails.
+        """
+        if not transcript:
+            raise SummarizationError("No transcript available for summary generation")
+
+        chunks = chunk_text(transcript, self.chunk_tokens)
+        if job is not None:
+            job.add_total(len(chunks) + self._tree_size(len(chunks)))
+        chunk_summaries = await asyncio.gather(*(self._node(chunk, "summary", job, ("summary", i)) for i, chunk in enumerate(chunks)))
+        return await self._reduce(list(chunk_summaries), job)
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "chunk_tokens": self.chunk_tokens,
+            "fan_in": self.fan_in,
+            "node_cache": self.node_cache.stats()
+        }
@@ -0,0 +1,80 @@
+"""
+MetadataService against offline providers; no network needed:
+
+    python -m pytest backend/tests
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metadata_helper import MetadataProvider, MetadataService, StubMetadataProvider, UNKNOWN_METADATA
+from store_helper import VideoStore
+
+class FailingProvider(MetadataProvider):
+    """Stands in for oEmbed or yt-dlp when the lookup fails."""
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    async def fetch(self, video_id):
+        self.calls += 1
+        raise RuntimeError(f"{self.name} unavailable")
+
+class CountingStub(StubMetadataProvider):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.calls = 0
+
+    async def fetch(self, video_id):
+        self.calls += 1
+        return await super().fetch(video_id)
+
+def make_service(tmp_path, providers, ttl_seconds=3600):
+    return MetadataService(providers, VideoStore(str(tmp_path / "store.db")), ttl_seconds=ttl_seconds)
+
+def test_falls_back_through_providers_in_order(tmp_path):
+    oembed, yt_dlp = FailingProvider("oembed"), FailingProvider("yt_dlp")
+    stub = CountingStub(entries={"abc": {"channel": "Channel", "title": "Title"}})
+    service = make_service(tmp_path, [oembed, yt_dlp, stub])
+
+    assert asyncio.run(service.get("abc")) == {"channel": "Channel", "title": "Title"}
+    assert (oembed.calls, yt_dlp.calls, stub.calls) == (1, 1, 1)
+    assert service.errors == {"oembed": 1, "yt_dlp": 1, "stub": 0}
+    assert service.fetches["stub"] == 1
+
+def test_serves_from_store_until_ttl_expires(tmp_path):
+    stub = CountingStub()
+    service = make_service(tmp_path, [stub], ttl_seconds=0.2)
+
+    async def run():
+        first = await service.get("abc")
+        assert await service.get("abc") == first
+        assert stub.calls == 1 and service.hits == 1
+        await asyncio.sleep(0.3)
+        assert await service.get("abc") == first
+        assert stub.calls == 2
+
+    asyncio.run(run())
+
+def test_unknown_metadata_is_never_cached(tmp_path):
+    oembed = FailingProvider("oembed")
+    service = make_service(tmp_path, [oembed])
+
+    assert asyncio.run(service.get("abc")) == UNKNOWN_METADATA
+    assert service.store.get("abc", "metadata") is None
+    assert asyncio.run(service.get("abc")) == UNKNOWN_METADATA
+    assert oembed.calls == 2 and service.failures == 2 and service.hits == 0
+
+def test_concurrent_lookups_share_one_fetch(tmp_path):
+    stub = CountingStub(latency=0.05)
+    service = make_service(tmp_path, [stub])
+
+    async def run():
+        return await asyncio.gather(*(service.get("abc") for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert stub.calls == 1
+    assert all(result == results[0] for result in results)
+    assert not service._inflight
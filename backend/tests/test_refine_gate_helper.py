@@ -0,0 +1,55 @@
+"""
+Query classification and refinement decisions; no model or network needed:
+
+    python -m pytest backend/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from refine_gate_helper import RefinementGate, classify_query
+
+CONFIDENT_DRAFT = "The speaker explains that gradient descent moves the weights against the gradient of the loss, step by step."
+
+@pytest.mark.parametrize("query", [
+    "Who is the speaker?",
+    "Explain the link between X and Y in this video",
+    "how do they update the weights in the lecture",
+    "What is the latest version mentioned in the video?",
+    "Summarize the talk"
+])
+def test_video_references_are_transcript_queries(query):
+    assert classify_query(query) == "transcript"
+
+@pytest.mark.parametrize("query", [
+    "What is the latest news about this company?",
+    "How many subscribers does the channel have?",
+    "What is the price of the GPU today?",
+    "Has anything changed in 2025?"
+])
+def test_time_sensitive_queries_are_web_queries(query):
+    assert classify_query(query) == "web"
+
+@pytest.mark.parametrize("query", [
+    "Who is Geoffrey Hinton?",
+    "Which version of Python is required?",
+    "Where can I find the link to the dataset?",
+    "How often is the model updated now?"
+])
+def test_everyday_words_are_not_web_cues(query):
+    assert classify_query(query) == "neutral"
+
+def test_transcript_query_with_confident_draft_is_not_refined():
+    gate = RefinementGate(log_path=None)
+    decision = gate.decide("Who is the speaker?", [(None, 0.8)], CONFIDENT_DRAFT, addition_mode=True)
+    assert decision["refine"] is False
+    assert decision["reason"] == "confident"
+
+def test_web_query_is_refined():
+    gate = RefinementGate(log_path=None)
+    decision = gate.decide("What is the latest news about this company?", [(None, 0.8)], CONFIDENT_DRAFT, addition_mode=True)
+    assert decision["refine"] is True
+    assert decision["reason"] == "web_query"
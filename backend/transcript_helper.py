@@ -0,0 +1,235 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+# --- Time Lookups ---
+def closest_index(starts, seconds):
+    """
+    Index of the start time closest to seconds in a sorted list of starts, or None if empty.
+    Ties go to the earlier entry. O(log n) replacement for scanning every segment.
+    """
+    if not starts:
+        return None
+    i = bisect_left(starts, seconds)
+    if i == 0:
+        return 0
+    if i == len(starts):
+        return len(starts) - 1
+    return i - 1 if seconds - starts[i - 1] <= starts[i] - seconds else i
+
+def containing_index(starts, seconds):
+    """Index of the last entry starting at or before seconds (clamped to 0), or None if empty."""
+    if not starts:
+        return None
+    return max(0, bisect_right(starts, seconds) - 1)
+
+# --- Formatting ---
+def format_timestamp(seconds):
+    """Convert seconds to HH:MM:SS format."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes:02d}:{seconds+1:02d}"
+
+# --- Columnar Segment Storage ---
+class SegmentTable:
+    """
+    Compact, array-backed transcript segments.
+
+    Start/end times are float arrays, texts live in one string buffer addressed
+    by an offsets array, and word_offsets holds cumulative word counts
+    (word_offsets[i] = words in segments[:i]). Segment numbers are positions + 1.
+    Per-segment dicts in the original API shape are only built on demand.
+    """
+    __slots__ = ("starts", "ends", "text", "text_offsets", "word_offsets", "last_duration")
+
+    def __init__(self, starts, ends, texts, last_duration=None):
+        self.starts = array('d', starts)
+        self.ends = array('d', ends)
+        self.text = "".join(texts)
+        self.text_offsets = array('q', [0])
+        self.word_offsets = array('q', [0])
+        for text in texts:
+            self.text_offsets.append(self.text_offsets[-1] + len(text))
+            self.word_offsets.append(self.word_offsets[-1] + len(text.split()))
+        # The last segment reports its raw duration rather than end - start
+        self.last_duration = last_duration
+
+    @classmethod
+    def from_raw(cls, entries):
+        """Build from YouTube raw transcript entries, clipping each end to the next start."""
+        starts, ends, texts = [], [], []
+        for i, entry in enumerate(entries):
+            start_time = entry['start']
+            calculated_end_time = start_time + entry.get('duration', 0)
+            if i < len(entries) - 1:
+                next_start_time = entries[i + 1]['start']
+                end_time = next_start_time if calculated_end_time > next_start_time else calculated_end_time
+            else:
+                end_time = calculated_end_time
+            starts.append(start_time)
+            ends.append(end_time)
+            texts.append(entry['text'])
+        last_duration = entries[-1].get('duration', 0) if entries else None
+        return cls(starts, ends, texts, last_duration)
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record["starts"], record["ends"], record["texts"], record.get("last_duration"))
+
+    def to_record(self):
+        return {
+            "starts": self.starts.tolist(),
+            "ends": self.ends.tolist(),
+            "texts": [self.text_at(i) for i in range(len(self))],
+            "last_duration": self.last_duration
+        }
+
+    def __len__(self):
+        return len(self.starts)
+
+    def position(self, segment_no):
+        """List position of a segment number, or None if it does not exist."""
+        i = segment_no - 1
+        return i if 0 <= i < len(self.starts) else None
+
+    def text_at(self, i):
+        return self.text[self.text_offsets[i]:self.text_offsets[i + 1]]
+
+    def word_count(self, i):
+        return self.word_offsets[i + 1] - self.word_offsets[i]
+
+    def duration(self, i):
+        if i == len(self.starts) - 1 and self.last_duration is not None:
+            return self.last_duration
+        return self.ends[i] - self.starts[i]
+
+    def row(self, i):
+        """Segment i as the dict served by the API (formatted Start/End/Duration)."""
+        return {
+            "Segment": i + 1,
+            "Text": self.text_at(i),
+            "Start": format_timestamp(self.starts[i]),
+            "End": format_timestamp(self.ends[i]),
+            "Duration": format_timestamp(self.duration(i))
+        }
+
+    def to_dicts(self):
+        return [self.row(i) for i in range(len(self.starts))]
+
+    def segment_at(self, seconds):
+        """Position of the segment whose start is closest to seconds, in O(log n)."""
+        return closest_index(self.starts, seconds)
+
+class WordIndex:
+    """Word boundaries of a long string as compact offset arrays, so slicing by word index needs no word list."""
+    __slots__ = ("text", "word_starts", "word_ends")
+
+    def __init__(self, text):
+        self.text = text or ""
+        self.word_starts = array('q')
+        self.word_ends = array('q')
+        for match in re.finditer(r"\S+", self.text):
+            self.word_starts.append(match.start())
+            self.word_ends.append(match.end())
+
+    def __len__(self):
+        return len(self.word_starts)
+
+    def join(self, left, right):
+        """Equivalent of " ".join(text.split()[left:right])."""
+        if right <= left:
+            return ""
+        return " ".join(self.text[self.word_starts[left]:self.word_ends[right - 1]].split())
+
+def context_text(segments, words, i):
+    """Words of the whole transcript around segment i, used as translation context."""
+    total_words = len(words)
+    segment_start_word_idx = segments.word_offsets[i]
+    segment_word_count = segments.word_count(i)
+
+    left_idx = max(0, segment_start_word_idx - 10)
+    right_idx = min(total_words, segment_start_word_idx + segment_word_count + 15)
+
+    if i == 0:
+        left_idx = 0
+        right_idx = min(50, total_words)
+    elif i == len(segments) - 1:
+        left_idx = max(0, total_words - 50)
+        right_idx = total_words
+
+    return words.join(left_idx, right_idx)
+
+def span_context_text(segments, words, first, last):
+    """Words of the whole transcript around segments first..last (inclusive), shared by one batch translation."""
+    total_words = len(words)
+    left_idx = max(0, segments.word_offsets[first] - 10)
+    right_idx = min(total_words, segments.word_offsets[last + 1] + 15)
+    return words.join(left_idx, right_idx)
+
+# --- Chunking ---
+def chunk_transcript(transcript_data, max_words=50, segment_times=None):
+    """
+    Splits the transcript into chunks of approximately max_words words while preserving timestamps.
+    If segment_times ([start, end] seconds per segment) is given, chunks also carry
+    numeric StartSeconds/EndSeconds.
+    """
+    transcript_list = transcript_data.get("transcript", [])
+
+    if not transcript_list or not isinstance(transcript_list, list):
+        print("Error: Transcript data is empty or not in the expected format.")
+        return []
+
+    chunks = []
+    current_chunk = []
+    current_word_count = 0
+    chunk_start_time = None
+    chunk_start_seconds = None
+
+    for segment_index, segment in enumerate(transcript_list):
+        if not isinstance(segment, dict) or "Text" not in segment:
+            print(f"Skipping invalid segment: {segment}")
+            continue
+
+        words = segment["Text"].split()
+        word_count = len(words)
+
+        if chunk_start_time is None:
+            chunk_start_time = segment["Start"]
+            chunk_start_seconds = segment_times[segment_index][0] if segment_times else None
+
+        if current_chunk and current_word_count + word_count > max_words:
+            chunk = {
+                "Text": " ".join(current_chunk),
+                "Start": chunk_start_time,
+                "End": transcript_list[segment_index - 1]["End"]
+            }
+            if segment_times:
+                chunk["StartSeconds"] = chunk_start_seconds
+                chunk["EndSeconds"] = segment_times[segment_index - 1][1]
+            chunks.append(chunk)
+
+            current_chunk = []
+            current_word_count = 0
+            chunk_start_time = segment["Start"]
+            chunk_start_seconds = segment_times[segment_index][0] if segment_times else None
+
+        current_chunk.extend(words)
+        current_word_count += word_count
+
+    if current_chunk:
+        chunk = {
+            "Text": " ".join(current_chunk),
+            "Start": chunk_start_time,
+            "End": transcript_list[-1]["End"]
+        }
+        if segment_times:
+            chunk["StartSeconds"] = chunk_start_seconds
+            chunk["EndSeconds"] = segment_times[-1][1]
+        chunks.append(chunk)
+
+    return chunks
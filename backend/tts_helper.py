@@ -0,0 +1,140 @@
+import abc
+import asyncio
+import os
+import uuid
+import aiohttp
+import edge_tts
+from dub_helper import SILENT_FRAME, SILENT_FRAME_SECONDS
+
+# --- Backend Interface ---
+class TTSBackend(abc.ABC):
+    """
+    A text-to-speech engine producing MP3 audio (24 kHz mono, like edge-tts).
+
+    Subclasses implement _stream(); callers use stream() or save(), which hold one of
+    the backend's max_concurrency slots for the duration of a synthesis.
+    """
+    name = None
+
+    def __init__(self, voices, default_voice, max_concurrency=4):
+        self.voices = voices
+        self.default_voice = default_voice
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+        self.active = 0
+
+    def voice_for(self, lang):
+        return self.voices.get(lang, self.default_voice)
+
+    @abc.abstractmethod
+    def _stream(self, text, voice):
+        """Async generator yielding the MP3 bytes for text in voice."""
+
+    async def stream(self, text, voice):
+        """Yield MP3 bytes as they are synthesised."""
+        async with self._semaphore:
+            self.requests += 1
+            self.active += 1
+            try:
+                async for data in self._stream(text, voice):
+                    yield data
+            finally:
+                self.active -= 1
+
+    async def save(self, text, voice, output_path):
+        """Synthesise text into output_path, writing a uniquely named temporary file first."""
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                async for data in self.stream(text, voice):
+                    f.write(data)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "requests": self.requests
+        }
+
+# --- edge-tts ---
+class _SharedConnector(aiohttp.TCPConnector):
+    """TCP connector that survives the ClientSession edge-tts opens and closes around every call."""
+    async def close(self, *args, **kwargs):
+        pass
+
+    async def shutdown(self):
+        await aiohttp.TCPConnector.close(self)
+
+class EdgeTTSBackend(TTSBackend):
+    """
+    Microsoft Edge online TTS through edge-tts.
+
+    Every synthesis is its own websocket, which cannot be pooled, but all of them share
+    one aiohttp connector so DNS results and the connection limit persist across calls.
+    """
+    name = "edge"
+
+    def __init__(self, voices, default_voice, max_concurrency=4):
+        super().__init__(voices, default_voice, max_concurrency)
+        self._connector = None
+
+    def _shared_connector(self):
+        # Created lazily because the connector binds to the running event loop
+        if self._connector is None or self._connector.closed:
+            self._connector = _SharedConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        return self._connector
+
+    async def _stream(self, text, voice):
+        communicate = edge_tts.Communicate(text, voice, connector=self._shared_connector())
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    async def close(self):
+        if self._connector is not None:
+            await self._connector.shutdown()
+            self._connector = None
+
+# --- Local Silence ---
+class SilenceTTSBackend(TTSBackend):
+    """
+    Offline stand-in that returns deterministic silent MP3 audio, for benchmarks and tests.
+
+    Output length is seconds_per_word per word (at least one frame). An optional latency
+    simulates the round trip of a network engine.
+    """
+    name = "silence"
+
+    def __init__(self, voices, default_voice, max_concurrency=4, seconds_per_word=0.35, latency=0.0):
+        super().__init__(voices, default_voice, max_concurrency)
+        self.seconds_per_word = seconds_per_word
+        self.latency = latency
+
+    async def _stream(self, text, voice):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        frames = max(1, round(len(text.split()) * self.seconds_per_word / SILENT_FRAME_SECONDS))
+        # Yield in ~1 s chunks, like a streaming engine
+        chunk_frames = round(1 / SILENT_FRAME_SECONDS)
+        for start in range(0, frames, chunk_frames):
+            yield SILENT_FRAME * min(chunk_frames, frames - start)
+
+TTS_BACKENDS = {
+    EdgeTTSBackend.name: EdgeTTSBackend,
+    SilenceTTSBackend.name: SilenceTTSBackend
+}
+
+def create_tts_backend(name, voices, default_voice, **options):
+    """Instantiate a registered backend by name."""
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}', expected one of {sorted(TTS_BACKENDS)}")
+    return TTS_BACKENDS[name](voices, default_voice, **options)
@@ -15,24 +15,30 @@ function getCurrentVideoTime() {
     return video ? Math.floor(video.currentTime) : null;
 }
 
-function findClosestSegment(transcript, currentTime) {
-    let closestSegment = null;
-    let minDiff = Infinity;
-    transcript.forEach((segment, index) => {
-        let segmentStart = convertTimeToSeconds(segment.Start);
-        let diff = Math.abs(segmentStart - currentTime);
-        if (diff < minDiff) {
-            minDiff = diff;
-            closestSegment = index;
-        }
-    });
-    return closestSegment;
+function buildSegmentStarts(transcript) {
+    return transcript.map(segment => convertTimeToSeconds(segment.Start));
+}
+
+function findClosestSegment(starts, currentTime) {
+    // Binary search over the sorted start times instead of scanning every segment
+    if (!starts || starts.length === 0) return null;
+    let low = 0;
+    let high = starts.length;
+    while (low < high) {
+        let mid = (low + high) >> 1;
+        if (starts[mid] < currentTime) low = mid + 1;
+        else high = mid;
+    }
+    if (low === 0) return 0;
+    if (low === starts.length) return starts.length - 1;
+    return (currentTime - starts[low - 1] <= starts[low] - currentTime) ? low - 1 : low;
 }
 
 let tabs;
 let vid_id;
 let intervalId;
 let transcriptDataGlobal;
+let segmentStartsGlobal;
 let audio = null;
 let stopPlayback = false;
 
@@ -57,11 +63,11 @@ function initializePopupLogic() {
         };
 
         safeBind("fetchSummary", async () => {
-            await fetchWithOutput(`http://127.0.0.1:5000/concise_summary/${vid_id}`, "concise_summary");
+            await runGenerationJob(`http://127.0.0.1:5000/concise_summary/${vid_id}`);
         });
 
         safeBind("fetchNotes", async () => {
-            await fetchWithOutput(`http://127.0.0.1:5000/notes/${vid_id}`, "notes");
+            await runGenerationJob(`http://127.0.0.1:5000/notes/${vid_id}`);
         });
 
         safeBind("fetchTranscript", async () => {
@@ -73,6 +79,7 @@ function initializePopupLogic() {
                     return;
                 }
                 transcriptDataGlobal = transcriptData.transcript;
+                segmentStartsGlobal = buildSegmentStarts(transcriptDataGlobal);
                 let outputDiv = document.getElementById("output");
                 outputDiv.innerHTML = "";
                 transcriptData.transcript.forEach((segment, index) => {
@@ -129,7 +136,8 @@ function initializePopupLogic() {
                 submitButton.textContent = "Processing...";
 
                 try {
-                    const response = await fetch("http://127.0.0.1:5000/process", {
+                    // Streamed: sources first, then the draft answer as it is generated, then the refined answer
+                    const response = await fetch("http://127.0.0.1:5000/process?stream=1", {
                         method: "POST",
                         headers: { "Content-Type": "application/json" },
                         body: JSON.stringify({
@@ -139,11 +147,13 @@ function initializePopupLogic() {
                         })
                     });
 
-                    const data = await response.json();
-                    if (response.ok) {
-                        document.getElementById("output").innerHTML = `<h3>Answer:</h3>${data.final_answer}<div class="video-info"><small>From: ${data.title} by ${data.channel}</small></div>`;
+                    if (!response.ok) {
+                        const data = await response.json();
+                        alert(`Error: ${data.error || "Unknown error"}`);
+                    } else {
+                        await renderAnswerStream(response);
                         queryInput.value = "";
-                    } else alert(`Error: ${data.error || "Unknown error"}`);
+                    }
                 } catch (err) {
                     alert(`Network error: ${err.message}`);
                 } finally {
@@ -176,21 +186,77 @@ function initializePopupLogic() {
     });
 }
 
-async function fetchWithOutput(url, field) {
-    const timeoutDuration = 100000;
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), timeoutDuration);
+// Render /process?stream=1 Server-Sent Events into the output panel
+async function renderAnswerStream(response) {
+    const output = document.getElementById("output");
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let answer = "";
+    let info = "";
+
+    const show = (status) => {
+        output.innerHTML = `<h3>Answer:</h3>`;
+        output.appendChild(document.createTextNode(answer));
+        if (status) output.insertAdjacentHTML("beforeend", `<div><small>${status}</small></div>`);
+        if (info) output.insertAdjacentHTML("beforeend", info);
+    };
+
+    show("Searching the video...");
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = (message.match(/^event: (.*)$/m) || [])[1];
+            const data = JSON.parse((message.match(/^data: (.*)$/m) || [])[1] || "{}");
+
+            if (event === "context") {
+                info = `<div class="video-info"><small>From: ${data.title} by ${data.channel}</small></div>`;
+                show("Generating answer...");
+            } else if (event === "token") {
+                answer += data.text;
+                show("Generating answer...");
+            } else if (event === "draft") {
+                show("Refining with web search...");
+            } else if (event === "refined" || event === "done") {
+                answer = data.answer || data.final_answer || answer;
+                show(event === "done" ? "" : "Finishing...");
+            } else if (event === "error") {
+                throw new Error(data.error);
+            }
+        }
+    }
+}
+
+// Start a notes/summary job and poll it, showing partial output as chunks finish
+async function runGenerationJob(url) {
+    const pollInterval = 2000;
+    const output = document.getElementById("output");
 
     try {
-        let response = await fetch(url, { signal: controller.signal });
-        clearTimeout(timeoutId);
+        let response = await fetch(url, { method: "POST" });
         if (!response.ok) throw new Error(`HTTP Error: ${response.status}`);
-        let data = await response.json();
-        if (!data || !data[field]) throw new Error(`No ${field} available for this video.`);
-        document.getElementById("output").textContent = data[field];
+        let job = await response.json();
+
+        while (job.status === "queued" || job.status === "running") {
+            output.textContent = `Generating... (${job.done}/${job.total || "?"} parts)\n\n` + (job.partial || "");
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            response = await fetch(`http://127.0.0.1:5000/jobs/${job.job_id}`);
+            if (!response.ok) throw new Error(`HTTP Error: ${response.status}`);
+            job = await response.json();
+        }
+
+        if (job.status === "failed") throw new Error(job.error || "Generation failed.");
+        if (!job.result) throw new Error("Nothing was generated for this video.");
+        output.textContent = job.result;
     } catch (error) {
         console.error("Fetch error:", error);
-        document.getElementById("output").textContent = error.message;
+        output.textContent = error.message;
     }
 }
 
@@ -200,7 +266,7 @@ async function updateTranscript() {
         function: getCurrentVideoTime
     }, (results) => {
         if (!results || !results[0] || results[0].result === null) return;
-        let currentSegment = findClosestSegment(transcriptDataGlobal, results[0].result);
+        let currentSegment = findClosestSegment(segmentStartsGlobal, results[0].result);
         highlightAndScrollTranscript(currentSegment);
     });
 }
@@ -271,6 +337,7 @@ async function handleLanguageInput() {
             }
             
             transcriptDataGlobal = data.transcript;
+            segmentStartsGlobal = buildSegmentStarts(transcriptDataGlobal);
             console.log("Transcript fetched successfully:", transcriptDataGlobal.length, "segments");
         }
         
@@ -326,7 +393,7 @@ async function playSegmentAudio(targetLang) {
             }
 
             // Find segment
-            let segmentIdx = findClosestSegment(transcriptDataGlobal, currentTime);
+            let segmentIdx = findClosestSegment(segmentStartsGlobal, currentTime);
             console.log("Closest segment index:", segmentIdx);
             
             if (segmentIdx === null) {
@@ -336,7 +403,7 @@ async function playSegmentAudio(targetLang) {
             }
 
             // Construct URL
-            const listenUrl = `http://127.0.0.1:5000/listen_audio/${vid_id}/${targetLang}/${segmentIdx + 1}`;
+            const listenUrl = `http://127.0.0.1:5000/listen_audio/${vid_id}/${targetLang}/${segmentIdx + 1}?stream=1`;
             console.log("Fetching audio from:", listenUrl);
             
             // Update UI to show generating status